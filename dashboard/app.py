@@ -1,8 +1,76 @@
-import os, requests, pandas as pd, streamlit as st
+import os, re, requests, pandas as pd, streamlit as st
+
+from data import ApiClient
+from live import LiveData
 
 # Try local API first, fall back to remote if needed
 API_BASE = os.getenv("API_BASE", "https://happyrobot-trucking-loadsapi.onrender.com")
 API_KEY = os.getenv("API_KEY", "mysecret")
+# How often an open page checks the live copy for changes to show
+DASHBOARD_REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "2"))
+# How long fetched API results are reused before being revalidated
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+
+@st.cache_resource
+def api_client():
+    """The pooled API client, one per dashboard process, shared by every session"""
+    return ApiClient(API_BASE, API_KEY, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def live_data():
+    """The live copy of the API's data, one per dashboard process, shared by every session"""
+    return LiveData(api_client()).start()
+
+def live_results(live, name, order=None):
+    """
+    (records, frame) from the live copy, in `order` if given. Both are kept
+    in session state with the version they were built from and reused until
+    the copy changes.
+    """
+    cache = st.session_state.setdefault("live_cache", {})
+    version, records = live.snapshot(name)
+    cached = cache.get(name)
+    if cached is None or cached["version"] != version:
+        records = order(records) if order else records
+        cached = cache[name] = {"version": version, "results": records, "frame": pd.DataFrame(records)}
+    return cached["results"], cached["frame"]
+
+def newest_first(conversations):
+    # Same order as GET /conversations: by timestamp, newest first, ties in list order
+    return sorted(conversations, key=lambda c: c.get("timestamp") or "", reverse=True)
+
+def mc_matches(search, mc_number):
+    """
+    True if `search` appears in `mc_number`: digits anywhere in it when the
+    search has digits, so "070" finds "MC-070208", else case-insensitively
+    as typed
+    """
+    digits = re.sub(r"\D", "", search)
+    if digits:
+        return digits in re.sub(r"\D", "", str(mc_number or ""))
+    return search.lower() in str(mc_number or "").lower()
+
+def fetch_results(path):
+    """
+    GET an API list endpoint through the client's cache, which revalidates
+    with the ETag once the TTL is up.
+
+    Returns (response, results, frame). The DataFrame is kept in session
+    state and only rebuilt when the client hands back different results.
+    """
+    fetched = api_client().fetch(path)
+    cache = st.session_state.setdefault("api_frames", {})
+    cached = cache.get(path)
+    if cached is None or cached["data"] is not fetched.data:
+        cached = cache[path] = {"data": fetched.data, "frame": pd.DataFrame(fetched.results)}
+    return fetched.response, fetched.results, cached["frame"]
+
+def fetch_stats():
+    """Aggregates from GET /stats, or None if the request fails."""
+    try:
+        return api_client().fetch("/stats").data
+    except requests.RequestException:
+        return None
 
 # Set page config with simple title
 st.set_page_config(
@@ -20,6 +88,30 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+live = live_data()
+if "live_versions" not in st.session_state:
+    # A session's first run gives a just-started process time to download the data
+    live.wait_ready(5)
+# Versions of the live copy this run shows; watch_for_changes reruns the page once they move on
+st.session_state.live_versions = (live.version("loads"), live.version("conversations"))
+if not live.ready:
+    st.warning(f"Live updates unavailable, showing data fetched per refresh ({live.error or 'connecting'})")
+    # Fetch what the page shows in parallel up front; the tabs then read it from the client's cache
+    try:
+        api_client().fetch_many(["/loads", "/conversations", "/stats"])
+    except requests.RequestException:
+        pass   # each tab reports its own failure
+stats = live.stats() if live.ready else fetch_stats()
+
+if hasattr(st, "fragment"):
+    @st.fragment(run_every=DASHBOARD_REFRESH_SECONDS)
+    def watch_for_changes():
+        """Rerun the page when the live copy changes; reads local state only"""
+        if (live.version("loads"), live.version("conversations")) != st.session_state.live_versions:
+            st.rerun()
+
+    watch_for_changes()
+
 # Create tabs
 tab1, tab2 = st.tabs(["📊 Loads Dashboard", "💬 Customer Conversations"])
 
@@ -28,20 +120,20 @@ with tab1:
     
     st.caption(f"API_BASE={API_BASE}")
     try:
-        resp = requests.get(f"{API_BASE}/loads", headers={"x-api-key": API_KEY}, timeout=15)
-        if not resp.ok:
-            st.error(f"Request failed: {resp.status_code} {resp.reason}")
-            st.code(resp.text)
-            data = []
-        else:
-            payload = resp.json()
-            data = payload.get("results", [])
+        if live.ready:
+            data, df = live_results(live, "loads")
             st.success(f"Found {len(data)} loads")
+        else:
+            resp, data, df = fetch_results("/loads")
+            if not resp.ok:
+                st.error(f"Request failed: {resp.status_code} {resp.reason}")
+                st.code(resp.text)
+            else:
+                st.success(f"Found {len(data)} loads")
     except Exception as e:
         st.exception(e)
         data = []
-
-    df = pd.DataFrame(data)
+        df = pd.DataFrame()
 
     st.subheader("Available Loads")
     st.dataframe(df, use_container_width=True)
@@ -57,12 +149,12 @@ with tab1:
     else:
         st.dataframe(booked_df, use_container_width=True)
 
-    if not df.empty:
+    if stats and stats["loads"]["total"]:
         st.subheader("Equipment mix")
-        st.bar_chart(df["equipment_type"].value_counts())
+        st.bar_chart(pd.Series(stats["loads"]["equipment_mix"], name="count"))
 
         st.subheader("Avg miles by origin (top 10)")
-        st.bar_chart(df.groupby("origin")["miles"].mean().sort_values(ascending=False).head(10))
+        st.bar_chart(pd.Series(stats["loads"]["avg_miles_by_origin"], name="miles"))
 
     # Load Management Section
     st.divider()
@@ -111,11 +203,10 @@ with tab1:
                     }
                     
                     try:
-                        resp = requests.post(f"{API_BASE}/loads", 
-                                           json=new_load, 
-                                           headers={"x-api-key": API_KEY}, 
-                                           timeout=15)
+                        resp = api_client().post("/loads", json=new_load, invalidates=("/loads", "/stats"))
                         if resp.ok:
+                            # Wait for the change to reach the live copy so the rerun shows it
+                            live.wait_for("loads", load_id)
                             st.success(f"Load {load_id} added successfully!")
                             st.session_state.form_clear_trigger += 1  # Clear form by changing keys
                             st.rerun()
@@ -135,10 +226,9 @@ with tab1:
             if delete_submitted:
                 if delete_load_id:
                     try:
-                        resp = requests.delete(f"{API_BASE}/loads/{delete_load_id}", 
-                                             headers={"x-api-key": API_KEY}, 
-                                             timeout=15)
+                        resp = api_client().delete(f"/loads/{delete_load_id}", invalidates=("/loads", "/stats"))
                         if resp.ok:
+                            live.wait_for("loads", delete_load_id, present=False)
                             st.success(f"Load {delete_load_id} deleted successfully!")
                             st.session_state.form_clear_trigger += 1  # Clear form by changing keys
                             st.rerun()
@@ -157,15 +247,16 @@ with tab2:
     # Fetch conversations from API
     st.caption(f"API_BASE={API_BASE}")
     try:
-        resp = requests.get(f"{API_BASE}/conversations", headers={"x-api-key": API_KEY}, timeout=15)
-        if not resp.ok:
-            st.error(f"Request failed: {resp.status_code} {resp.reason}")
-            st.code(resp.text)
-            conversations_data = []
-        else:
-            payload = resp.json()
-            conversations_data = payload.get("results", [])
+        if live.ready:
+            conversations_data, _ = live_results(live, "conversations", order=newest_first)
             st.success(f"Found {len(conversations_data)} conversations")
+        else:
+            resp, conversations_data, _ = fetch_results("/conversations")
+            if not resp.ok:
+                st.error(f"Request failed: {resp.status_code} {resp.reason}")
+                st.code(resp.text)
+            else:
+                st.success(f"Found {len(conversations_data)} conversations")
     except Exception as e:
         st.exception(e)
         conversations_data = []
@@ -181,25 +272,13 @@ with tab2:
             # Keep the load status filter
             status_filter = st.selectbox("📊 Load Status", ["All", "Booked", "Not Booked", "Unknown"])
 
-        # Apply filters
-        filtered_conversations = conversations_data.copy()
-        
-        # Apply MC number filter
-        if mc_number_search:
-            filtered_conversations = [c for c in filtered_conversations 
-                                    if mc_number_search.lower() in str(c.get("mc_number", "")).lower()]
-        
-        # Apply status filter using agent notes
-        if status_filter != "All":
-            if status_filter == "Booked":
-                filtered_conversations = [c for c in filtered_conversations 
-                                        if c.get('agent_notes') and 'Load Status: Successful' in c.get('agent_notes', '')]
-            elif status_filter == "Not Booked":
-                filtered_conversations = [c for c in filtered_conversations 
-                                        if c.get('agent_notes') and ('Load Status: Not' in c.get('agent_notes', '') or 'Load Status: Unsuccessful' in c.get('agent_notes', ''))]
-            elif status_filter == "Unknown":
-                filtered_conversations = [c for c in filtered_conversations 
-                                        if not (c.get('agent_notes') and 'Load Status:' in c.get('agent_notes', ''))]
+        # Filter the local copy
+        load_status = status_filter.lower().replace(" ", "_") if status_filter != "All" else None
+        filtered_conversations = [
+            c for c in conversations_data
+            if (not mc_number_search or mc_matches(mc_number_search, c.get("mc_number")))
+            and (load_status is None or c.get("load_status") == load_status)
+        ]
 
         # Show results count with better styling
         st.markdown(f"### 📋 Conversations ({len(filtered_conversations)} found)")
@@ -236,12 +315,11 @@ with tab2:
                     if conv.get('mc_number'):
                         st.write(f"🚛 MC: {conv.get('mc_number')}")
                     
-                    # Load booking status from agent notes
-                    if conv.get('agent_notes') and 'Load Status:' in conv.get('agent_notes', ''):
-                        if 'Load Status: Successful' in conv.get('agent_notes', ''):
-                            st.success("✅ Load: BOOKED")
-                        elif 'Load Status: Not' in conv.get('agent_notes', '') or 'Load Status: Unsuccessful' in conv.get('agent_notes', ''):
-                            st.error("❌ Load: NOT BOOKED")
+                    # Load booking status
+                    if conv.get('load_status') == 'booked':
+                        st.success("✅ Load: BOOKED")
+                    elif conv.get('load_status') == 'not_booked':
+                        st.error("❌ Load: NOT BOOKED")
                     
                     # Follow-up information
                     if conv.get('follow_up_needed'):
@@ -271,30 +349,23 @@ with tab2:
                         st.write(f"**💰 Rate:** ${conv.get('rate_discussed'):,}")
 
         # Summary metrics
-        if conversations_data:
+        if stats:
+            conversation_stats = stats["conversations"]
+            status_counts = conversation_stats["load_status"]
             st.divider()
             st.subheader("📊 Conversation Metrics")
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Conversations", len(conversations_data))
+                st.metric("Total Conversations", conversation_stats["total"])
             with col2:
-                # Count successful vs unsuccessful loads from agent notes
-                successful_loads = len([c for c in conversations_data 
-                                      if c.get('agent_notes') and 'Load Status: Successful' in c.get('agent_notes', '')])
-                st.metric("Customer Classification", f"{successful_loads}/{len(conversations_data)}")
+                st.metric("Customer Classification", f"{status_counts['booked']}/{conversation_stats['total']}")
             
             # Add bar chart for load classification
             st.subheader("Load Classification Results")
-            unsuccessful_loads = len([c for c in conversations_data 
-                                    if c.get('agent_notes') and ('Load Status: Not' in c.get('agent_notes', '') or 'Load Status: Unsuccessful' in c.get('agent_notes', ''))])
-            unknown_loads = len(conversations_data) - successful_loads - unsuccessful_loads
-            
-            # Create data for bar chart
-            import pandas as pd
             classification_data = pd.DataFrame({
                 'Status': ['Successful', 'Unsuccessful', 'Unknown'],
-                'Count': [successful_loads, unsuccessful_loads, unknown_loads]
+                'Count': [status_counts['booked'], status_counts['not_booked'], status_counts['unknown']]
             })
             
             # Display bar chart
@@ -0,0 +1,101 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class Fetched:
+    """A GET result: the response it came from and its decoded JSON (None if it failed)."""
+    response: requests.Response
+    data: Any
+    fetched_at: float
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+    @property
+    def results(self):
+        return (self.data or {}).get("results", [])
+
+
+class ApiClient:
+    """
+    The dashboard's access to the API, shared by every page run of the
+    process.
+
+    Requests go through one requests.Session whose connections are pooled
+    and kept alive, so a page run doesn't pay for new TCP and TLS
+    handshakes. GET results are cached for `ttl` seconds; after that they
+    are revalidated with If-None-Match, and a 304 keeps the cached copy.
+    Writes made through the client drop the cached results they affect.
+    """
+
+    def __init__(self, api_base: str, api_key: str, ttl: float = 30.0, pool_size: int = 8, timeout: float = 15.0):
+        self.api_base = api_base.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["x-api-key"] = api_key
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="dashboard-fetch")
+        self._cache: Dict[str, Fetched] = {}
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"{self.api_base}{path}"
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(self.url(path), **kwargs)
+
+    def fetch(self, path: str, max_age: Optional[float] = None) -> Fetched:
+        """
+        GET `path`, from the cache if fetched less than `max_age` (default
+        `ttl`) seconds ago. Raises requests.RequestException.
+        """
+        with self._lock:
+            cached = self._cache.get(path)
+        now = time.monotonic()
+        if cached and now - cached.fetched_at < (self.ttl if max_age is None else max_age):
+            return cached
+        etag = cached.response.headers.get("ETag") if cached else None
+        resp = self.get(path, headers={"If-None-Match": etag} if etag else None)
+        if resp.status_code == 304 and cached:
+            fetched = Fetched(cached.response, cached.data, now)
+        elif resp.ok:
+            fetched = Fetched(resp, resp.json(), now)
+        else:
+            return Fetched(resp, None, now)
+        with self._lock:
+            self._cache[path] = fetched
+        return fetched
+
+    def fetch_many(self, paths: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Fetched]:
+        """fetch() each path, concurrently. Raises the first error hit."""
+        futures = {path: self._executor.submit(self.fetch, path, max_age) for path in paths}
+        return {path: future.result() for path, future in futures.items()}
+
+    def invalidate(self, *prefixes: str):
+        """Drop cached results for paths starting with any of `prefixes`."""
+        with self._lock:
+            for path in [p for p in self._cache if p.startswith(prefixes)]:
+                del self._cache[path]
+
+    def post(self, path: str, json: Any, invalidates: Iterable[str] = ("",)) -> requests.Response:
+        """POST, then drop the cached results under `invalidates` (by default all of them)."""
+        resp = self.session.post(self.url(path), json=json, timeout=self.timeout)
+        self.invalidate(*invalidates)
+        return resp
+
+    def delete(self, path: str, invalidates: Iterable[str] = ("",)) -> requests.Response:
+        """DELETE, then drop the cached results under `invalidates` (by default all of them)."""
+        resp = self.session.delete(self.url(path), timeout=self.timeout)
+        self.invalidate(*invalidates)
+        return resp
@@ -0,0 +1,188 @@
+import json, threading, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from data import ApiClient
+
+# The field each collection's records are keyed by
+KEYS = {"loads": "load_id", "conversations": "conversation_id"}
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    (event, data, id) for each Server-Sent Event in `lines`. Comments and
+    blocks without data, such as a bare `retry:`, are skipped.
+    """
+    event, data, event_id = "message", [], None
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data), event_id
+            event, data, event_id = "message", [], None
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+        elif name == "id":
+            event_id = value
+
+
+class LiveData:
+    """
+    A local copy of the API's loads and conversations, kept current from
+    its GET /events stream by a background thread.
+
+    On first connecting, and whenever the API says a collection must be
+    resynced, the collection is downloaded in full once; after that only
+    the changes come down the stream, and a dropped stream is resumed from
+    the last event seen. One instance serves every page view of the
+    dashboard process, so open dashboards put no load on the API between
+    changes.
+
+    Each collection has a version, bumped whenever its copy changes, so
+    callers can tell whether anything they derived from it is stale.
+    """
+
+    def __init__(self, client: ApiClient, collections: Tuple[str, ...] = ("loads", "conversations"),
+                 read_timeout: float = 60.0):
+        self.client = client
+        self.collections = collections
+        self.read_timeout = read_timeout
+        self.error: Optional[str] = None
+        self._records: Dict[str, Dict[Any, Dict[str, Any]]] = {name: {} for name in collections}
+        self._versions = {name: 0 for name in collections}
+        self._snapshots: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        self._synced = set()
+        self._stats: Optional[Tuple[Tuple[int, ...], Dict[str, Any]]] = None
+        self._last_event_id: Optional[str] = None
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dashboard-live-data", daemon=True)
+
+    def start(self) -> "LiveData":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    # -- reading ---------------------------------------------------------
+
+    @property
+    def ready(self) -> bool:
+        """True once every collection has been downloaded."""
+        with self._changed:
+            return len(self._synced) == len(self.collections)
+
+    def wait_ready(self, timeout: float) -> bool:
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self._synced) == len(self.collections), timeout)
+
+    def version(self, name: str) -> int:
+        with self._changed:
+            return self._versions[name]
+
+    def snapshot(self, name: str) -> Tuple[int, List[Dict[str, Any]]]:
+        """(version, records) of a collection. Don't modify the records."""
+        with self._changed:
+            version = self._versions[name]
+            cached = self._snapshots.get(name)
+            if cached is None or cached[0] != version:
+                cached = self._snapshots[name] = (version, list(self._records[name].values()))
+            return cached
+
+    def has(self, name: str, record_id: Any) -> bool:
+        with self._changed:
+            return record_id in self._records[name]
+
+    def wait_for(self, name: str, record_id: Any, present: bool = True, timeout: float = 2.0) -> bool:
+        """Wait until the record with `record_id` is (or is no longer) in the local copy."""
+        with self._changed:
+            return self._changed.wait_for(lambda: (record_id in self._records[name]) == present, timeout)
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """GET /stats, fetched again only when a collection has changed since the last fetch."""
+        with self._changed:
+            versions = tuple(self._versions.values())
+            if self._stats is not None and self._stats[0] == versions:
+                return self._stats[1]
+        try:
+            resp = self.client.get("/stats")
+        except requests.RequestException:
+            return None
+        if not resp.ok:
+            return None
+        stats = resp.json()
+        with self._changed:
+            self._stats = (versions, stats)
+        return stats
+
+    # -- keeping the copy current ----------------------------------------
+
+    def _run(self):
+        delay = 1.0
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self._follow()
+                self.error = None
+            except (requests.RequestException, ValueError, KeyError) as e:
+                self.error = str(e)
+            if self._stopped.is_set():
+                return
+            # Streams end on their own every few minutes; only back off when they fail fast
+            delay = 1.0 if time.monotonic() - started > 30 else min(delay * 2, 30.0)
+            self._stopped.wait(delay)
+
+    def _follow(self):
+        headers = {"Accept": "text/event-stream"}
+        if self._last_event_id:
+            headers["Last-Event-ID"] = self._last_event_id
+        params = {"collections": ",".join(self.collections)}
+        with self.client.get("/events", params=params, headers=headers, stream=True,
+                             timeout=(10, self.read_timeout)) as resp:
+            resp.raise_for_status()
+            for event, data, event_id in parse_sse(resp.iter_lines(decode_unicode=True)):
+                if self._stopped.is_set():
+                    return
+                self._apply(event, json.loads(data))
+                if event_id is not None:
+                    self._last_event_id = event_id
+
+    def _apply(self, event: str, data: Dict[str, Any]):
+        if event == "ready":
+            # A fresh stream starts from the latest changes: download what
+            # came before them. Changes made during the download are
+            # replayed afterwards, which leaves the same result.
+            if not data["resumed"] or len(self._synced) < len(self.collections):
+                self._download(*self.collections)
+        elif event == "resync":
+            self._download(data["collection"])
+        elif event in self._records:
+            with self._changed:
+                records = self._records[event]
+                if data["op"] == "deleted":
+                    records.pop(data["id"], None)
+                else:
+                    records[data["id"]] = data["record"]
+                self._versions[event] += 1
+                self._changed.notify_all()
+
+    def _download(self, *names: str):
+        # Concurrently; a 304 on revalidation reuses the client's cached copy
+        fetched = self.client.fetch_many([f"/{name}" for name in names], max_age=0)
+        for name in names:
+            result = fetched[f"/{name}"]
+            result.response.raise_for_status()
+            records = {record[KEYS[name]]: record for record in result.results}
+            with self._changed:
+                self._records[name] = records
+                self._versions[name] += 1
+                self._synced.add(name)
+                self._changed.notify_all()
@@ -1,57 +1,258 @@
-import json, os, threading
+import json, os, re, tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query, Header
+from email.utils import formatdate
+from itertools import islice
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional, Dict, Any, Tuple
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
+
+from bulk import CSV_MEDIA_TYPE, body_format, csv_rows, csv_stream, ndjson_rows
+from changes import ChangeLog
+from conversation_fields import LOAD_STATUSES, normalize_conversation, normalize_load_status
+from conversation_index import ConversationIndex
+from conversation_search import ConversationSearch, parse_query
+from encoding import JSON_MEDIA_TYPE, FragmentCache, dumps, list_body
+from events import EVENT_STREAM_MEDIA_TYPE, ChangeBroadcaster, change_events
+from gazetteer import Gazetteer
+from geo_index import LoadGeoIndex
+from ingest_queue import IngestQueue
+from journal import Compactor, JournalStorage
+from load_table import LoadTable
+import metrics
+from metrics import CallbackCounter, Gauge, InstrumentedStorage, MetricsMiddleware
+from pagination import (
+    NDJSON_MEDIA_TYPE, decode_cursor, encode_cursor, ndjson_chunks, ndjson_stream, parse_fields, project, wants_ndjson,
+)
+from sqlite_storage import SqliteDatabase, SqliteStorage
+from stats import ConversationStats, LoadStats
+from store import Collection, GroupCommit, JsonFileStorage
+from timestamps import parse_timestamp
+from transcripts import TranscriptArchive
 
 load_dotenv()
 
 API_KEY = os.getenv("LOADS_API_KEY", "mysecret")
+# "json" keeps each collection in a JSON file; "sqlite" keeps both in one
+# SQLite database, importing the JSON files the first time it is created
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
 DATA_PATH = os.getenv("LOADS_DATA_PATH", "loads.json")
 CONVERSATIONS_PATH = os.getenv("CONVERSATIONS_DATA_PATH", "conversations.json")
+SQLITE_PATH = os.getenv("SQLITE_DATA_PATH", "happyrobot.db")
+# With the json backend: "json" rewrites conversations.json on every write;
+# "journal" appends to a log next to it and compacts in the background
+CONVERSATIONS_STORAGE = os.getenv("CONVERSATIONS_STORAGE", "json")
+JOURNAL_COMPACT_BYTES = int(os.getenv("CONVERSATIONS_JOURNAL_COMPACT_BYTES", str(8 * 1024 * 1024)))
+# Single webhook calls arriving within this many ms are saved in one write (0 disables)
+WEBHOOK_GROUP_COMMIT_MS = float(os.getenv("WEBHOOK_GROUP_COMMIT_MS", "2"))
+# "sync" saves webhook data before responding; "async" queues it, answers
+# 202 straight away and lets background workers save it
+WEBHOOK_INGEST_MODE = os.getenv("WEBHOOK_INGEST_MODE", "sync")
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+# Encoded JSON kept per record, for each of loads and conversations
+RESPONSE_CACHE_MB = float(os.getenv("RESPONSE_CACHE_MB", "64"))
+# Full webhook transcripts, compressed into append-only segment files here
+TRANSCRIPTS_PATH = os.getenv("TRANSCRIPTS_PATH", "transcripts")
+TRANSCRIPT_SEGMENT_MB = float(os.getenv("TRANSCRIPT_SEGMENT_MB", "64"))
+# Change logs behind GET /changes, one file per collection, each keeping
+# at least this many of the latest changes
+CHANGES_PATH = os.getenv("CHANGES_PATH", "changes")
+CHANGE_LOG_RETENTION = int(os.getenv("CHANGE_LOG_RETENTION", "10000"))
+# GET /events: how often each worker looks for changes made by other
+# workers, the gap between keepalive comments, and how long one stream
+# lasts before the client is made to reconnect
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "1"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_STREAM_SECONDS = float(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+MAX_PAGE_SIZE = 1000
+MAX_WEBHOOK_BATCH = 5000
+# POST /loads/bulk: errors listed in the response, and the body size kept in
+# memory before it spills to a temporary file
+MAX_BULK_ERRORS = 1000
+BULK_SPOOL_BYTES = 8 * 1024 * 1024
+
+if STORAGE_BACKEND == "sqlite":
+    database = SqliteDatabase(SQLITE_PATH)
+    loads_storage = SqliteStorage(database, "loads", key="load_id", import_from=DATA_PATH)
+    conversations_storage = SqliteStorage(database, "conversations", key="conversation_id", import_from=CONVERSATIONS_PATH)
+elif STORAGE_BACKEND == "json":
+    loads_storage = JsonFileStorage(DATA_PATH)
+    if CONVERSATIONS_STORAGE == "journal":
+        conversations_storage = JournalStorage(CONVERSATIONS_PATH, key="conversation_id", compact_bytes=JOURNAL_COMPACT_BYTES)
+    else:
+        conversations_storage = JsonFileStorage(CONVERSATIONS_PATH, missing_ok=True)
+else:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected 'json' or 'sqlite'")
+
+# Resident copies of the data; see store.Collection. Loads are held column
+# by column, which also serves GET /loads filtering
+loads_store = Collection(InstrumentedStorage(loads_storage, "loads"), key="load_id", table=LoadTable)
+conversations_store = Collection(InstrumentedStorage(conversations_storage, "conversations"), key="conversation_id")
+compactor = Compactor(conversations_store)
+webhook_commits = GroupCommit(conversations_store, window=WEBHOOK_GROUP_COMMIT_MS / 1000)
+webhook_queue = IngestQueue(conversations_store.upsert_many, maxsize=WEBHOOK_QUEUE_SIZE, workers=WEBHOOK_WORKERS)
+# Every change made through the API, numbered per collection, for GET /changes
+CHANGE_LOGS = {
+    name: ChangeLog(os.path.join(CHANGES_PATH, f"{name}.log"), retention=CHANGE_LOG_RETENTION)
+    for name in ("loads", "conversations")
+}
+loads_store.change_log = CHANGE_LOGS["loads"]
+conversations_store.change_log = CHANGE_LOGS["conversations"]
+change_broadcaster = ChangeBroadcaster(CHANGE_LOGS, interval=EVENTS_POLL_SECONDS)
+# Transcripts live outside the conversation records, so listing conversations never reads them
+transcripts = TranscriptArchive(TRANSCRIPTS_PATH, segment_bytes=int(TRANSCRIPT_SEGMENT_MB * 1024 * 1024))
 
-_loads_write_lock = threading.Lock()
-_conversations_write_lock = threading.Lock()
+# Secondary indexes for the list endpoints, maintained by the stores on every change
+conversation_index = ConversationIndex()
+conversations_store.subscribe(conversation_index)
+conversation_search = ConversationSearch()
+conversations_store.subscribe(conversation_search)
+load_stats = LoadStats()
+loads_store.subscribe(load_stats)
+conversation_stats = ConversationStats()
+conversations_store.subscribe(conversation_stats)
+# City -> coordinates, bundled with the API; loads are indexed by pickup point
+gazetteer = Gazetteer()
+load_geo_index = LoadGeoIndex(gazetteer)
+loads_store.subscribe(load_geo_index)
+# Each record's response JSON, dropped when the record changes
+load_fragments = FragmentCache("load_id", max_bytes=int(RESPONSE_CACHE_MB * 1024 * 1024))
+loads_store.subscribe(load_fragments)
+conversation_fragments = FragmentCache("conversation_id", max_bytes=int(RESPONSE_CACHE_MB * 1024 * 1024))
+conversations_store.subscribe(conversation_fragments)
+
+# Instrumentation for GET /metrics; gauges are read only when scraped
+COLLECTIONS = {"loads": loads_store, "conversations": conversations_store}
+for name, store in COLLECTIONS.items():
+    store.lock_wait_observer = lambda seconds, name=name: metrics.lock_wait.observe(seconds, name)
+metrics.registry.register(Gauge(
+    "collection_records", "Records currently held per collection.",
+    lambda: [((name,), len(store)) for name, store in COLLECTIONS.items()], labels=("collection",),
+))
+FRAGMENT_CACHES = {"loads": load_fragments, "conversations": conversation_fragments}
+metrics.registry.register(Gauge(
+    "response_cache_bytes", "Encoded record JSON currently cached per collection.",
+    lambda: [((name,), cache.stats()["bytes"]) for name, cache in FRAGMENT_CACHES.items()], labels=("collection",),
+))
+metrics.registry.register(CallbackCounter(
+    "response_cache_lookups_total", "Cached record JSON lookups, by whether the record had to be encoded.",
+    lambda: [((name, result), cache.stats()[stat]) for name, cache in FRAGMENT_CACHES.items()
+             for result, stat in (("hit", "hits"), ("miss", "misses"))],
+    labels=("collection", "result"),
+))
+metrics.registry.register(Gauge(
+    "webhook_queue_depth", "Webhook payloads waiting in the async ingest queue.",
+    lambda: [((), webhook_queue.stats()["queue_depth"])],
+))
+metrics.registry.register(Gauge(
+    "webhook_queue_lag_seconds", "Age of the oldest payload in the async ingest queue.",
+    lambda: [((), webhook_queue.lag())],
+))
+metrics.registry.register(Gauge(
+    "change_log_latest_seq", "Sequence number of the latest logged change per collection.",
+    lambda: [((name,), log.latest()) for name, log in CHANGE_LOGS.items()], labels=("collection",),
+))
+metrics.registry.register(Gauge(
+    "transcripts_archived", "Conversations with a full transcript in the archive.",
+    lambda: [((), transcripts.stats()["transcripts"])],
+))
+metrics.registry.register(Gauge(
+    "transcript_archive_bytes", "Size of the transcript segment files.",
+    lambda: [((), transcripts.stats()["bytes"])],
+))
+
+def backfill_conversation_fields():
+    """
+    Give conversations saved before load_status existed a normalized
+    load_status and mc_digits, in one write. Records that are already
+    normalized are left alone, so once this has run it writes nothing.
+    """
+    conversations_store.update_all(normalize_conversation)
 
-app = FastAPI(title="Loads API", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load both collections up front so the first request doesn't pay for it
+    loads_store.refresh()
+    conversations_store.refresh()
+    backfill_conversation_fields()
+    transcripts.open()
+    compactor.start()
+    if WEBHOOK_INGEST_MODE == "async":
+        webhook_queue.start()
+    change_broadcaster.start()
+    yield
+    await change_broadcaster.stop()
+    # Save everything still queued before the storage goes away
+    webhook_queue.stop()
+    compactor.stop()
+    loads_store.close()
+    conversations_store.close()
+    for log in CHANGE_LOGS.values():
+        log.close()
+    transcripts.close()
+
+app = FastAPI(title="Loads API", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
 )
+# Outermost, so its timings include everything else
+app.add_middleware(MetricsMiddleware)
 
-def read_loads():
-    with open(DATA_PATH, "r") as f:
-        return json.load(f)
+def require_api_key(x_api_key: Optional[str] = Header(None)):
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
-def write_loads(loads_list):
-    with _loads_write_lock:
-        with open(DATA_PATH, "w") as f:
-            json.dump(loads_list, f, indent=2)
+# A loads cursor names the last load of its page; if that load has since
+# been deleted somewhere this worker can't place it, paging starts over
+STALE_LOAD_CURSOR = "Cursor refers to a load that no longer exists; start again without a cursor"
 
-def read_conversations():
+def read_cursor(kind: str, cursor: Optional[str]):
+    if not cursor:
+        return None
     try:
-        with open(CONVERSATIONS_PATH, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+        return decode_cursor(kind, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-def write_conversations(conversations_list):
-    with _conversations_write_lock:
-        with open(CONVERSATIONS_PATH, "w") as f:
-            json.dump(conversations_list, f, indent=2)
-
-def require_api_key(x_api_key: Optional[str] = Header(None)):
-    if x_api_key != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+def check_not_modified(store: Collection, if_none_match: Optional[str], response: Optional[Response] = None, variant: str = "") -> Dict[str, str]:
+    """
+    Validators for the store's current data, added to `response` if given.
+    Raises a bare 304 if the client's If-None-Match already names them, so the
+    data is never read. Call before reading the data so the ETag is never
+    newer than the body it is sent with.
+    """
+    etag = store.etag if not variant else f'{store.etag[:-1]}-{variant}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(store.modified_at, usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept",
+    }
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            raise HTTPException(status_code=304, headers=headers)
+    if response is not None:
+        response.headers.update(headers)
+    return headers
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition: request latency and sizes per route, storage timings, lock waits, record counts"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/loads")
 def search_loads(
     origin: Optional[str] = Query(None),
@@ -60,30 +261,174 @@ def search_loads(
     pickup_from: Optional[str] = Query(None),   # ISO date
     pickup_to: Optional[str] = Query(None),
     min_rate: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),   # comma-separated, e.g. load_id,origin
+    response_format: Optional[str] = Query(None, alias="format"),   # "ndjson" to stream
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     x_api_key: Optional[str] = Header(None)
 ):
     require_api_key(x_api_key)
-    loads = read_loads()
-    def match(l):
-        ok = True
-        if origin:         ok &= origin.lower() in l["origin"].lower()
-        if destination:    ok &= destination.lower() in l["destination"].lower()
-        if equipment_type: ok &= equipment_type.lower() == l["equipment_type"].lower()
-        if min_rate is not None: ok &= l["loadboard_rate"] >= min_rate
-        if pickup_from:
-            ok &= datetime.fromisoformat(l["pickup_datetime"].replace("Z","+00:00")) >= datetime.fromisoformat(pickup_from)
-        if pickup_to:
-            ok &= datetime.fromisoformat(l["pickup_datetime"].replace("Z","+00:00")) <= datetime.fromisoformat(pickup_to)
-        return ok
-    return {"results": [l for l in loads if match(l)]}
+    after = read_cursor("loads", cursor)
+    if after is not None and not isinstance(after, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    loads_store.refresh()
+    ndjson = wants_ndjson(response_format, accept)
+    validators = check_not_modified(loads_store, if_none_match, variant="ndjson" if ndjson else "")
+    field_list = parse_fields(fields)
+    table = loads_store.table()
+    # Whole records are served from the per-record JSON cache, so the
+    # search only needs their ids; a projection needs the records themselves
+    whole = field_list is None
+    if ndjson:
+        # Stream one load per line as it is matched
+        try:
+            matched = table.iter_search(
+                origin=origin, destination=destination, equipment_type=equipment_type,
+                pickup_from=pickup_from, pickup_to=pickup_to, min_rate=min_rate, after=after, ids_only=whole,
+                limit=limit,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="pickup_from/pickup_to must be ISO 8601 datetimes")
+        except KeyError:
+            raise HTTPException(status_code=400, detail=STALE_LOAD_CURSOR)
+        if whole:
+            lines = (load_fragments.get(load_id, table.get) for _, load_id in islice(matched, limit))
+            body = ndjson_chunks(line for line in lines if line is not None)
+        else:
+            body = ndjson_stream((load for _, load in islice(matched, limit)), field_list)
+        return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE, headers=validators)
+    try:
+        results, next_after = table.search(
+            origin=origin, destination=destination, equipment_type=equipment_type,
+            pickup_from=pickup_from, pickup_to=pickup_to, min_rate=min_rate,
+            after=after, limit=limit, ids_only=whole,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="pickup_from/pickup_to must be ISO 8601 datetimes")
+    except KeyError:
+        raise HTTPException(status_code=400, detail=STALE_LOAD_CURSOR)
+    next_cursor = encode_cursor("loads", next_after) if next_after is not None else None
+    if whole:
+        fragments = (load_fragments.get(load_id, table.get) for load_id in results)
+        content = list_body((f for f in fragments if f is not None), next_cursor)
+    else:
+        content = dumps({"results": project(results, field_list), "next_cursor": next_cursor})
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
+
+@app.get("/loads/match")
+def match_loads(
+    near: Optional[str] = Query(None),   # the carrier's city, e.g. "Fort Worth, TX"; or give lat and lon
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_miles: float = Query(150, gt=0, le=3000),
+    equipment_type: Optional[str] = Query(None),
+    pickup_from: Optional[str] = Query(None),   # ISO date
+    pickup_to: Optional[str] = Query(None),
+    destination: Optional[str] = Query(None),   # only loads delivering near here, e.g. "Denver, CO"
+    destination_radius_miles: float = Query(150, gt=0, le=3000),
+    sort: str = Query("deadhead", pattern="^(deadhead|rate_per_mile)$"),
+    limit: int = Query(10, ge=1, le=100),
+    if_none_match: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Loads picking up within radius_miles of a carrier, best first: by
+    deadhead miles to the pickup, then rate per mile (or the other way
+    round with sort=rate_per_mile)
+    """
+    require_api_key(x_api_key)
+    if lat is not None and lon is not None:
+        position = (lat, lon)
+    elif near:
+        position = gazetteer.locate(near)
+        if position is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location {near!r}; give lat and lon instead")
+    else:
+        raise HTTPException(status_code=400, detail="Give the carrier's position as near=City, ST or as lat and lon")
+    toward = None
+    if destination:
+        point = gazetteer.locate(destination)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown destination {destination!r}")
+        toward = (*point, destination_radius_miles)
+    try:
+        lo = parse_timestamp(pickup_from) if pickup_from else None
+        hi = parse_timestamp(pickup_to) if pickup_to else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="pickup_from/pickup_to must be ISO 8601 datetimes")
+    loads_store.refresh()
+    validators = check_not_modified(loads_store, if_none_match)
+    table = loads_store.table()
+    matches = load_geo_index.match(
+        *position, radius_miles, equipment_type=equipment_type, pickup_from=lo, pickup_to=hi,
+        destination=toward, sort=sort, limit=limit,
+    )
+    results = []
+    for load_id, deadhead, rate_per_mile in matches:
+        fragment = load_fragments.get(load_id, table.get)
+        if fragment is not None:
+            results.append(
+                dumps({"deadhead_miles": round(deadhead, 1),
+                       "rate_per_mile": round(rate_per_mile, 2) if rate_per_mile is not None else None})[:-1]
+                + b',"load":' + fragment + b"}"
+            )
+    content = b'{"origin":' + dumps({"lat": position[0], "lon": position[1]}) + b',"results":[' + b",".join(results) + b"]}"
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
+
+@app.get("/loads/export")
+def export_loads(
+    origin: Optional[str] = Query(None),
+    destination: Optional[str] = Query(None),
+    equipment_type: Optional[str] = Query(None),
+    pickup_from: Optional[str] = Query(None),
+    pickup_to: Optional[str] = Query(None),
+    min_rate: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
+    response_format: Optional[str] = Query(None, alias="format"),   # "ndjson" (default) or "csv"
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Every load matching the GET /loads filters, streamed as NDJSON or CSV in
+    load list order. Loads are read a block at a time, so the export never
+    holds more than one block of them.
+    """
+    require_api_key(x_api_key)
+    if response_format not in (None, "ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    as_csv = response_format == "csv" or (response_format is None and CSV_MEDIA_TYPE in (accept or ""))
+    loads_store.refresh()
+    validators = check_not_modified(loads_store, if_none_match, variant="export-csv" if as_csv else "export")
+    field_list = parse_fields(fields)
+    try:
+        matched = loads_store.table().iter_search(
+            origin=origin, destination=destination, equipment_type=equipment_type,
+            pickup_from=pickup_from, pickup_to=pickup_to, min_rate=min_rate,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="pickup_from/pickup_to must be ISO 8601 datetimes")
+    loads = (load for _, load in matched)
+    if as_csv:
+        body = csv_stream(loads, field_list or LOAD_CSV_FIELDS)
+        media_type, filename = f"{CSV_MEDIA_TYPE}; charset=utf-8", "loads.csv"
+    else:
+        body = ndjson_stream(loads, field_list)
+        media_type, filename = NDJSON_MEDIA_TYPE, "loads.ndjson"
+    headers = {**validators, "Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 @app.get("/loads/{load_id}")
-def get_load(load_id: str, x_api_key: Optional[str] = Header(None)):
+def get_load(load_id: str, if_none_match: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None)):
     require_api_key(x_api_key)
-    for l in read_loads():
-        if l["load_id"] == load_id:
-            return l
-    raise HTTPException(status_code=404, detail="Load not found")
+    loads_store.refresh()
+    validators = check_not_modified(loads_store, if_none_match)
+    content = load_fragments.get(load_id, loads_store.get)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Load not found")
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
 
 class LoadCreate(BaseModel):
     load_id: str
@@ -99,6 +444,14 @@ class LoadCreate(BaseModel):
     num_of_pieces: Optional[int] = None
     miles: Optional[int] = None
     dimensions: Optional[str] = None
+    # Looked up from origin/destination in the gazetteer when not given
+    origin_lat: Optional[float] = Field(None, ge=-90, le=90)
+    origin_lon: Optional[float] = Field(None, ge=-180, le=180)
+    destination_lat: Optional[float] = Field(None, ge=-90, le=90)
+    destination_lon: Optional[float] = Field(None, ge=-180, le=180)
+
+# Columns of a CSV export, unless `fields` picks others; a bulk CSV upload reads the same ones
+LOAD_CSV_FIELDS = list(LoadCreate.model_fields)
 
 class ConversationData(BaseModel):
     conversation_id: str
@@ -118,6 +471,7 @@ class ConversationData(BaseModel):
     follow_up_needed: Optional[bool] = False
     follow_up_date: Optional[str] = None
     agent_notes: Optional[str] = None
+    load_status: Optional[str] = None  # booked, not_booked, unknown; read from agent_notes if omitted
     timestamp: Optional[str] = None
 
 class WebhookPayload(BaseModel):
@@ -164,51 +518,111 @@ class WebhookPayload(BaseModel):
 @app.post("/loads")
 def create_load(load: LoadCreate, x_api_key: Optional[str] = Header(None)):
     require_api_key(x_api_key)
-    loads = read_loads()
-    
-    # Check if load_id already exists
-    for l in loads:
-        if l["load_id"] == load.load_id:
-            raise HTTPException(status_code=400, detail="Load ID already exists")
     
-    # Add new load
-    new_load = load.model_dump()
-    loads.append(new_load)
-    write_loads(loads)
+    # Add new load, rejecting a load_id that already exists
+    new_load = gazetteer.add_coordinates(load.model_dump())
+    if not loads_store.insert(new_load):
+        raise HTTPException(status_code=400, detail="Load ID already exists")
     
     return {"status": "created", "load_id": load.load_id}
 
+def import_loads(body, kind: str) -> Dict[str, Any]:
+    """
+    Validate each row of a bulk upload ("ndjson" or "csv") as a LoadCreate
+    and insert the valid ones in one commit. A load_id already on the board,
+    or repeated within the upload, is rejected; the first row using it wins.
+    """
+    if kind == "csv":
+        rows, validate = csv_rows(body), LoadCreate.model_validate
+    else:
+        rows, validate = ndjson_rows(body), LoadCreate.model_validate_json
+    existing = loads_store.table()
+    first_row: Dict[str, int] = {}
+    records = []
+    errors = []
+    rejected = {"invalid": 0, "duplicate": 0}
+    received = 0
+
+    def reject(entry: Dict[str, Any]):
+        rejected[entry["status"]] += 1
+        if len(errors) < MAX_BULK_ERRORS:
+            errors.append(entry)
+
+    for row, data in rows:
+        received = row
+        try:
+            load = validate(data)
+        except ValidationError as e:
+            reject({"row": row, "status": "invalid", "errors": e.errors(include_url=False, include_context=False)})
+            continue
+        load_id = load.load_id
+        if load_id in first_row:
+            reject({"row": row, "status": "duplicate", "load_id": load_id, "detail": f"load_id repeats row {first_row[load_id]}"})
+            continue
+        first_row[load_id] = row
+        if load_id in existing:
+            reject({"row": row, "status": "duplicate", "load_id": load_id, "detail": "Load ID already exists"})
+            continue
+        records.append(gazetteer.add_coordinates(load.model_dump()))
+
+    # Checked again under the write lock, for loads created since the check above
+    late = [record["load_id"] for record, ok in zip(records, loads_store.insert_many(records)) if not ok]
+    for load_id in late:
+        reject({"row": first_row[load_id], "status": "duplicate", "load_id": load_id, "detail": "Load ID already exists"})
+    if late:
+        errors.sort(key=lambda e: e["row"])
+
+    return {
+        "status": "processed",
+        "received": received,
+        "created": len(records) - len(late),
+        **rejected,
+        "errors": errors,
+        "errors_truncated": sum(rejected.values()) > len(errors),
+    }
+
+@app.post("/loads/bulk")
+async def bulk_create_loads(request: Request, x_api_key: Optional[str] = Header(None)):
+    """
+    Create many loads from an NDJSON body (Content-Type: application/x-ndjson,
+    one load per line) or a CSV body (Content-Type: text/csv, header line
+    first). Every row is validated as for POST /loads, and all valid loads
+    are saved in one write. Returns counts and the first MAX_BULK_ERRORS
+    rejected rows.
+    """
+    require_api_key(x_api_key)
+    kind = body_format(request.headers.get("content-type", ""))
+    if kind is None:
+        raise HTTPException(status_code=415, detail="Send Content-Type: application/x-ndjson or text/csv")
+
+    # The upload is spooled as it arrives, then read back a row at a time
+    with tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        return await run_in_threadpool(import_loads, body, kind)
+
 @app.delete("/loads/{load_id}")
 def delete_load(load_id: str, x_api_key: Optional[str] = Header(None)):
     require_api_key(x_api_key)
-    loads = read_loads()
     
     # Find and remove load
-    for i, l in enumerate(loads):
-        if l["load_id"] == load_id:
-            deleted_load = loads.pop(i)
-            write_loads(loads)
-            return {"status": "deleted", "load_id": load_id}
-    
-    raise HTTPException(status_code=404, detail="Load not found")
+    if loads_store.delete(load_id) is None:
+        raise HTTPException(status_code=404, detail="Load not found")
+    return {"status": "deleted", "load_id": load_id}
 
 @app.post("/conversations")
 def create_conversation(conversation: ConversationData, x_api_key: Optional[str] = Header(None)):
     require_api_key(x_api_key)
-    conversations = read_conversations()
-    
-    # Check if conversation_id already exists
-    for c in conversations:
-        if c["conversation_id"] == conversation.conversation_id:
-            raise HTTPException(status_code=400, detail="Conversation ID already exists")
     
     # Add timestamp if not provided
-    new_conversation = conversation.model_dump()
+    new_conversation = normalize_conversation(conversation.model_dump())
     if not new_conversation.get("timestamp"):
         new_conversation["timestamp"] = datetime.now().isoformat()
     
-    conversations.append(new_conversation)
-    write_conversations(conversations)
+    # Add conversation, rejecting a conversation_id that already exists
+    if not conversations_store.insert(new_conversation):
+        raise HTTPException(status_code=400, detail="Conversation ID already exists")
     
     return {"status": "created", "conversation_id": conversation.conversation_id}
 
@@ -217,10 +631,27 @@ def get_conversations(
     customer_name: Optional[str] = Query(None),
     priority: Optional[str] = Query(None),
     follow_up_needed: Optional[bool] = Query(None),
+    load_status: Optional[str] = Query(None, pattern=f"^({'|'.join(LOAD_STATUSES)})$"),
+    mc_number: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),   # comma-separated, e.g. conversation_id,mc_number
+    response_format: Optional[str] = Query(None, alias="format"),   # "ndjson" to stream
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     x_api_key: Optional[str] = Header(None)
 ):
     require_api_key(x_api_key)
-    conversations = read_conversations()
+    after = read_cursor("conversations", cursor)
+    if after is not None and not (isinstance(after, list) and len(after) == 2
+                                  and isinstance(after[0], str) and isinstance(after[1], str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    conversations_store.refresh()
+    ndjson = wants_ndjson(response_format, accept)
+    validators = check_not_modified(conversations_store, if_none_match, variant="ndjson" if ndjson else "")
+    field_list = parse_fields(fields)
+    # Noted before any record is read; see FragmentCache
+    generation = conversation_fragments.generation
     
     def match(c):
         ok = True
@@ -229,30 +660,186 @@ def get_conversations(
         if follow_up_needed is not None: ok &= c.get("follow_up_needed", False) == follow_up_needed
         return ok
     
-    # Sort by timestamp (newest first)
-    filtered_conversations = [c for c in conversations if match(c)]
-    filtered_conversations.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+    # Newest first, read off the timestamp-ordered index instead of sorting
+    unfiltered = not (customer_name or priority or follow_up_needed is not None)
+    indexed = {"load_status": load_status, "mc_number": mc_number}
+    if ndjson:
+        matched = islice(conversation_index.iter_newest_first(match=None if unfiltered else match, after=after, **indexed), limit)
+        if field_list is None:
+            body = ndjson_chunks(conversation_fragments.encoded(c, generation) for c in matched)
+        else:
+            body = ndjson_stream(matched, field_list)
+        return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE, headers=validators)
+    results, next_after = conversation_index.newest_first(
+        match=None if unfiltered else match, after=after, limit=limit, **indexed,
+    )
     
-    return {"results": filtered_conversations}
+    next_cursor = encode_cursor("conversations", next_after) if next_after is not None else None
+    if field_list is None:
+        content = list_body((conversation_fragments.encoded(c, generation) for c in results), next_cursor)
+    else:
+        content = dumps({"results": project(results, field_list), "next_cursor": next_cursor})
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
+
+@app.get("/conversations/search")
+def search_conversations(
+    q: str = Query(..., min_length=1, max_length=1000),   # e.g. "reefer miami follow-up" or "reefer miami OR reefer tampa"
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Full-text search over conversation summaries, agent notes, load
+    requirements, equipment and pickup/delivery locations, best match first
+    """
+    require_api_key(x_api_key)
+    after = read_cursor("conversation_search", cursor)
+    if after is not None and not (isinstance(after, list) and len(after) == 2
+                                  and isinstance(after[0], (int, float)) and isinstance(after[1], str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not parse_query(q):
+        raise HTTPException(status_code=400, detail="Query has no searchable terms")
+    conversations_store.refresh()
+    validators = check_not_modified(conversations_store, if_none_match)
+    field_list = parse_fields(fields)
+    generation = conversation_fragments.generation
+    results, total, next_after = conversation_search.search(q, limit=limit, after=after)
+    next_cursor = encode_cursor("conversation_search", list(next_after)) if next_after is not None else None
+    if field_list is None:
+        content = list_body((conversation_fragments.encoded(c, generation) for c in results), next_cursor, total=total)
+    else:
+        content = dumps({"results": project(results, field_list), "next_cursor": next_cursor, "total": total})
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
 
 @app.get("/conversations/{conversation_id}")
-def get_conversation(conversation_id: str, x_api_key: Optional[str] = Header(None)):
+def get_conversation(conversation_id: str, if_none_match: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None)):
     require_api_key(x_api_key)
-    for c in read_conversations():
-        if c["conversation_id"] == conversation_id:
-            return c
-    raise HTTPException(status_code=404, detail="Conversation not found")
+    conversations_store.refresh()
+    validators = check_not_modified(conversations_store, if_none_match)
+    content = conversation_fragments.get(conversation_id, conversations_store.get)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return Response(content=content, media_type=JSON_MEDIA_TYPE, headers=validators)
 
-@app.post("/webhook/extraction")
-def receive_extraction_webhook(payload: WebhookPayload, x_api_key: Optional[str] = Header(None)):
+@app.get("/conversations/{conversation_id}/transcript")
+def get_transcript(
+    conversation_id: str,
+    response_format: Optional[str] = Query(None, pattern="^(json|text)$", alias="format"),   # "text" for the bare transcript
+    if_none_match: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """The full transcript sent with the conversation's webhook, read from the transcript archive"""
+    require_api_key(x_api_key)
+    info = transcripts.info(conversation_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    # Archived frames never change; a new transcript gets a new location
+    headers = {"ETag": f'"{info["segment"]}-{info["offset"]}"', "Cache-Control": "private, no-cache"}
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        if "*" in tags or headers["ETag"] in tags:
+            raise HTTPException(status_code=304, headers=headers)
+    text = transcripts.read(info)
+    if response_format == "text":
+        # A lone surrogate has no UTF-8 form; the JSON form keeps it as an escape
+        return Response(content=text.encode("utf-8", "replace"), media_type="text/plain; charset=utf-8", headers=headers)
+    return Response(content=dumps({"conversation_id": conversation_id, "transcript": text}), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+@app.get("/stats")
+def get_stats(
+    top_origins: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    x_api_key: Optional[str] = Header(None)
+):
+    """Dashboard aggregates, maintained as loads and conversations change"""
+    require_api_key(x_api_key)
+    loads_store.refresh()
+    conversations_store.refresh()
+    loads = load_stats.summary()
+    return {
+        "loads": {
+            **loads,
+            "avg_miles_by_origin": dict(islice(loads["avg_miles_by_origin"].items(), top_origins)),
+        },
+        "conversations": conversation_stats.summary(),
+    }
+
+@app.get("/changes")
+def get_changes(
+    collection: str = Query(...),   # "loads" or "conversations"
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    x_api_key: Optional[str] = Header(None)
+):
     """
-    Webhook endpoint to receive extracted information from AI agents/systems.
-    Automatically converts webhook data into conversation records.
+    Changes to a collection after sequence number `since`, oldest first, for
+    keeping a copy of it current. Without `since`, returns no changes, only
+    the latest sequence number to start from. Answers 410 with
+    resync_required when `since` is older than the log keeps.
     """
     require_api_key(x_api_key)
-    
+    log = CHANGE_LOGS.get(collection)
+    if log is None:
+        raise HTTPException(status_code=400, detail=f"collection must be one of: {', '.join(CHANGE_LOGS)}")
+    if since is None:
+        entries, latest = [], log.latest()
+        since = latest
+    else:
+        entries, oldest, latest = log.since(since, limit)
+        if entries is None:
+            return JSONResponse(status_code=410, content={
+                "detail": "Too far behind; download the collection again and continue from `latest`",
+                "resync_required": True,
+                "oldest": oldest,
+                "latest": latest,
+            })
+    next_since = since + len(entries)
+    content = (b'{"collection":' + dumps(collection) + b',"changes":[' + b",".join(entries)
+               + b'],"next_since":' + dumps(next_since) + b',"latest":' + dumps(latest)
+               + b',"has_more":' + dumps(next_since < latest) + b',"resync_required":false}')
+    return Response(content=content, media_type=JSON_MEDIA_TYPE)
+
+@app.get("/events")
+def get_events(
+    collections: str = Query(",".join(CHANGE_LOGS)),   # comma-separated
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events stream of changes to loads and conversations, for
+    keeping a copy of them current without polling. Resumes after the
+    Last-Event-ID header (or `last_event_id`) when given, else starts from
+    the latest changes.
+    """
+    require_api_key(x_api_key)
+    names = parse_fields(collections) or []
+    unknown = [name for name in names if name not in CHANGE_LOGS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"collections must be among: {', '.join(CHANGE_LOGS)}")
+    resume = read_cursor("events", last_event_id_header or last_event_id)
+    if resume is not None and not isinstance(resume, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    positions = {}
+    for name in names:
+        since = (resume or {}).get(name)
+        positions[name] = since if isinstance(since, int) and since >= 0 else CHANGE_LOGS[name].latest()
+    resumed = resume is not None and all(isinstance(resume.get(name), int) for name in names)
+    body = change_events(change_broadcaster, positions, resumed=resumed,
+                         keepalive=EVENTS_KEEPALIVE_SECONDS, duration=EVENTS_STREAM_SECONDS)
+    return StreamingResponse(body, media_type=EVENT_STREAM_MEDIA_TYPE, headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def conversation_from_webhook(payload: WebhookPayload, id_suffix: str = "") -> Tuple[Dict[str, Any], Optional[int]]:
+    """
+    Convert a webhook payload into a conversation record.
+    Returns the record and the rate parsed from rate_mentioned, if any.
+    """
     # Generate conversation ID from call_id or timestamp
-    conversation_id = payload.call_id or f"webhook_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    conversation_id = payload.call_id or f"webhook_{datetime.now().strftime('%Y%m%d_%H%M%S')}{id_suffix}"
     
     # Create conversation summary from available data
     summary_parts = []
@@ -290,7 +877,6 @@ def receive_extraction_webhook(payload: WebhookPayload, x_api_key: Optional[str]
     if payload.rate_mentioned:
         try:
             # Extract numbers from rate string (e.g., "$2,500" -> 2500)
-            import re
             rate_match = re.search(r'[\d,]+', str(payload.rate_mentioned).replace(',', ''))
             if rate_match:
                 rate_discussed = int(rate_match.group())
@@ -332,32 +918,47 @@ def receive_extraction_webhook(payload: WebhookPayload, x_api_key: Optional[str]
         customer_priority=payload.priority_level or "medium",
         follow_up_needed=payload.follow_up_required or False,
         agent_notes=agent_notes,
+        load_status=normalize_load_status(payload.load_classification) if payload.load_classification else None,
         timestamp=payload.call_timestamp or datetime.now().isoformat(),
         miles=payload.miles
     )
     
-    # Save to conversations
-    conversations = read_conversations()
-    
-    # Check if conversation already exists (update instead of duplicate)
-    existing_index = None
-    for i, c in enumerate(conversations):
-        if c["conversation_id"] == conversation_id:
-            existing_index = i
-            break
+    return normalize_conversation(conversation_data.model_dump()), rate_discussed
+
+def archive_transcript(conversation_id: str, payload: WebhookPayload):
+    """
+    The record only keeps the first 300 characters; archive the rest.
+    Called once the record has been accepted, so a rejected call leaves
+    nothing behind.
+    """
+    if payload.transcript:
+        transcripts.put(conversation_id, payload.transcript)
+
+@app.post("/webhook/extraction")
+def receive_extraction_webhook(payload: WebhookPayload, x_api_key: Optional[str] = Header(None)):
+    """
+    Webhook endpoint to receive extracted information from AI agents/systems.
+    Automatically converts webhook data into conversation records.
+    """
+    require_api_key(x_api_key)
     
-    new_conversation = conversation_data.model_dump()
+    new_conversation, rate_discussed = conversation_from_webhook(payload)
+    conversation_id = new_conversation["conversation_id"]
     
-    if existing_index is not None:
-        # Update existing conversation
-        conversations[existing_index] = new_conversation
-        status = "updated"
-    else:
-        # Add new conversation
-        conversations.append(new_conversation)
-        status = "created"
+    if WEBHOOK_INGEST_MODE == "async":
+        if not webhook_queue.submit(new_conversation):
+            raise HTTPException(status_code=429, detail="Webhook queue is full, retry later", headers={"Retry-After": "1"})
+        archive_transcript(conversation_id, payload)
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "conversation_id": conversation_id,
+            "message": "Webhook data queued for processing; see GET /webhook/status"
+        })
     
-    write_conversations(conversations)
+    # Save to conversations, updating an existing record instead of duplicating it.
+    # Calls arriving within WEBHOOK_GROUP_COMMIT_MS of each other share one write.
+    status = "created" if webhook_commits.upsert(new_conversation) else "updated"
+    archive_transcript(conversation_id, payload)
     
     return {
         "status": status,
@@ -374,6 +975,78 @@ def receive_extraction_webhook(payload: WebhookPayload, x_api_key: Optional[str]
         }
     }
 
+@app.post("/webhook/extraction/batch")
+async def receive_extraction_webhook_batch(request: Request, x_api_key: Optional[str] = Header(None)):
+    """
+    Batch form of /webhook/extraction. The body is a JSON array of webhook
+    payloads, or one payload per line with Content-Type: application/x-ndjson.
+    Every valid item is converted exactly as the single-item webhook does and
+    all of them are saved in one write. Returns a status per item.
+    """
+    require_api_key(x_api_key)
+    
+    items = []
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Parse line by line as the body streams in
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            items.extend(line for line in lines if line.strip())
+            if len(items) > MAX_WEBHOOK_BATCH:
+                break
+        if buffer.strip():
+            items.append(buffer)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of webhook payloads")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of webhook payloads")
+    if len(items) > MAX_WEBHOOK_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_WEBHOOK_BATCH} payloads per batch")
+    
+    results = []
+    records = []
+    archived = []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, bytes):
+                payload = WebhookPayload.model_validate_json(item)
+            else:
+                payload = WebhookPayload.model_validate(item)
+        except ValidationError as e:
+            results.append({"index": index, "status": "invalid", "errors": e.errors(include_url=False, include_context=False)})
+            continue
+        new_conversation, _ = conversation_from_webhook(payload, id_suffix=f"_{index}")
+        records.append(new_conversation)
+        if payload.transcript:
+            archived.append((new_conversation["conversation_id"], payload.transcript))
+        results.append({"index": index, "status": None, "conversation_id": new_conversation["conversation_id"]})
+    
+    created = await run_in_threadpool(conversations_store.upsert_many, records)
+    await run_in_threadpool(transcripts.put_many, archived)
+    saved = iter(created)
+    for result in results:
+        if result["status"] is None:
+            result["status"] = "created" if next(saved) else "updated"
+    
+    return {
+        "status": "processed",
+        "received": len(items),
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "updated": sum(1 for r in results if r["status"] == "updated"),
+        "invalid": sum(1 for r in results if r["status"] == "invalid"),
+        "results": results
+    }
+
+@app.get("/webhook/status")
+def webhook_status(x_api_key: Optional[str] = Header(None)):
+    """Ingest mode, plus queue depth, lag and failure counts in async mode"""
+    require_api_key(x_api_key)
+    return {"mode": WEBHOOK_INGEST_MODE, **webhook_queue.stats()}
+
 @app.get("/webhook/test")
 def webhook_test_endpoint():
     """Test endpoint to verify webhook connectivity"""
@@ -383,6 +1056,9 @@ def webhook_test_endpoint():
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
             "POST /webhook/extraction": "Main webhook for receiving extracted call data",
+            "POST /webhook/extraction/batch": "Batch of webhook payloads (JSON array or NDJSON)",
+            "GET /conversations/{conversation_id}/transcript": "Full transcript of a webhook call",
+            "GET /webhook/status": "Webhook ingest queue depth, lag and failures",
             "GET /webhook/test": "This test endpoint"
         }
     }
@@ -0,0 +1,426 @@
+"""
+Load test for the Loads API.
+
+For each dataset size, writes synthetic loads and conversations (see
+synthetic.py), starts the API over them and drives its endpoints: paged,
+projected and filtered GET /loads, full and NDJSON listings, detail and
+conditional reads, conversations with each filter, /stats, webhook bursts
+and batches, and concurrent load create/delete. Each size is run
+in-process (Starlette's TestClient, no network) and against a local
+uvicorn over HTTP.
+
+Throughput and p50/p95/p99 latency are reported per scenario, written as
+JSON, and compared against a saved baseline:
+
+    cd load_api
+    python benchmarks/api_bench.py --sizes 1000,100000 --save-baseline
+    python benchmarks/api_bench.py --sizes 1000,100000 --output bench.json --fail-on-regression
+
+A scenario regresses when its p95 latency rises, or its throughput drops,
+by more than --tolerance relative to the baseline. Baselines only compare
+like with like: the same machine, storage backend and request counts.
+
+Writes against the JSON backend rewrite the whole file, so at 1M records
+pass --storage journal or --storage sqlite, or lower --write-requests.
+"""
+import argparse, json, math, os, platform, random, shutil, socket, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import synthetic
+
+API_KEY = "bench"
+HEADERS = {"x-api-key": API_KEY}
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+class Scenario:
+    """
+    One endpoint workload. `request(i)` returns (method, url, kwargs) for
+    the i-th request; a response whose status is not in `expect` counts as
+    an error. `kind` picks the request count: "read", "heavy" or "write".
+    """
+
+    def __init__(self, name: str, request: Callable[[int], tuple], expect=(200,), kind: str = "read",
+                 setup: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.request = request
+        self.expect = expect
+        self.kind = kind
+        self.setup = setup
+
+
+def scenarios(size: int, webhook_mode: str) -> List[Scenario]:
+    """Reads first, then writes, so conditional reads see a stable ETag."""
+    load_ids = [f"L-{i * 7919 % size}" for i in range(min(size, 1000))]
+    sample = list(synthetic.conversations(min(size, 1000)))
+    conversation_ids = [c["conversation_id"] for c in sample]
+    mc_numbers = [c["mc_number"] for c in sample]
+    cities = [c.split(",")[0].lower() for c in synthetic.CITIES]
+    equipment = synthetic.EQUIPMENT
+    etags: Dict[str, str] = {}
+
+    def get(url, **params):
+        return lambda i: ("GET", url, {"params": params, "headers": HEADERS})
+
+    def cycle(values, i):
+        return values[i % len(values)]
+
+    def remember_etag(client):
+        etags["loads"] = client.get("/loads", params={"limit": 100}, headers=HEADERS).headers.get("etag", "")
+
+    def webhook(i):
+        return {
+            "call_id": f"bench-call-{i}",
+            "mc_number": cycle(mc_numbers, i),
+            "customer_name": "Bench Carrier",
+            "pickup_location": cycle(synthetic.CITIES, i),
+            "delivery_location": cycle(synthetic.CITIES, i + 3),
+            "rate_mentioned": "$2,100",
+            "load_classification": "successful" if i % 2 else "not successful",
+        }
+
+    def new_load(i):
+        return dict(synthetic.make_load(i, random.Random(i)), load_id=f"BENCH-{i}")
+
+    webhook_ok = (202,) if webhook_mode == "async" else (200,)
+
+    return [
+        Scenario("health", get("/health")),
+        Scenario("loads_page", get("/loads", limit=100)),
+        Scenario("loads_page_fields", get("/loads", limit=100, fields="load_id,origin,loadboard_rate")),
+        Scenario("loads_all", get("/loads"), kind="heavy"),
+        Scenario("loads_ndjson", get("/loads", limit=1000, format="ndjson")),
+        Scenario("loads_export_csv", get("/loads/export", format="csv"), kind="heavy"),
+        Scenario("loads_filter_origin", lambda i: ("GET", "/loads", {"params": {"origin": cycle(cities, i), "limit": 100}, "headers": HEADERS})),
+        Scenario("loads_filter_equipment", lambda i: ("GET", "/loads", {"params": {"equipment_type": cycle(equipment, i), "limit": 100}, "headers": HEADERS})),
+        Scenario("loads_filter_pickup", get("/loads", pickup_from="2025-09-01T00:00:00Z", pickup_to="2025-09-02T00:00:00Z", limit=100)),
+        Scenario("loads_filter_min_rate", get("/loads", min_rate=5800, limit=100)),
+        Scenario("loads_filter_combo", lambda i: ("GET", "/loads", {"params": {
+            "origin": cycle(cities, i), "equipment_type": cycle(equipment, i), "min_rate": 3000, "limit": 100,
+        }, "headers": HEADERS})),
+        Scenario("loads_filter_all", lambda i: ("GET", "/loads", {"params": {
+            "origin": cycle(cities, i), "destination": cycle(cities, i + 5), "equipment_type": cycle(equipment, i),
+            "pickup_from": "2025-08-01T00:00:00Z", "pickup_to": "2025-09-15T00:00:00Z", "min_rate": 1000,
+        }, "headers": HEADERS})),
+        Scenario("loads_match", lambda i: ("GET", "/loads/match", {"params": {
+            "near": cycle(synthetic.CITIES, i), "radius_miles": 250, "equipment_type": cycle(equipment, i)}, "headers": HEADERS})),
+        Scenario("load_get", lambda i: ("GET", f"/loads/{cycle(load_ids, i)}", {"headers": HEADERS})),
+        Scenario("loads_not_modified", lambda i: ("GET", "/loads", {"params": {"limit": 100}, "headers": dict(HEADERS, **{"if-none-match": etags["loads"]})}),
+                 expect=(304,), setup=remember_etag),
+        Scenario("conversations_page", get("/conversations", limit=100)),
+        Scenario("conversations_filter_status", lambda i: ("GET", "/conversations", {"params": {
+            "load_status": ("booked", "not_booked", "unknown")[i % 3], "limit": 100}, "headers": HEADERS})),
+        Scenario("conversations_filter_mc", lambda i: ("GET", "/conversations", {"params": {"mc_number": cycle(mc_numbers, i)}, "headers": HEADERS})),
+        Scenario("conversations_filter_customer", lambda i: ("GET", "/conversations", {"params": {"customer_name": f"carrier {i % 5000} ", "limit": 100}, "headers": HEADERS})),
+        Scenario("conversations_search", lambda i: ("GET", "/conversations/search", {"params": {
+            "q": f"{cycle(equipment, i)} {cycle(cities, i)}", "limit": 50}, "headers": HEADERS})),
+        Scenario("conversations_search_or", lambda i: ("GET", "/conversations/search", {"params": {
+            "q": f"{cycle(cities, i)} OR {cycle(cities, i + 7)}", "limit": 50}, "headers": HEADERS})),
+        Scenario("conversation_get", lambda i: ("GET", f"/conversations/{cycle(conversation_ids, i)}", {"headers": HEADERS})),
+        Scenario("stats", get("/stats")),
+        Scenario("webhook_burst", lambda i: ("POST", "/webhook/extraction", {"json": webhook(i), "headers": HEADERS}),
+                 expect=webhook_ok, kind="write"),
+        Scenario("webhook_batch_100", lambda i: ("POST", "/webhook/extraction/batch", {
+            "json": [webhook(1000000 + i * 100 + j) for j in range(100)], "headers": HEADERS}), expect=webhook_ok, kind="write"),
+        Scenario("load_create", lambda i: ("POST", "/loads", {"json": new_load(i), "headers": HEADERS}), kind="write"),
+        Scenario("load_delete", lambda i: ("DELETE", f"/loads/BENCH-{i}", {"headers": HEADERS}), kind="write"),
+        Scenario("loads_bulk_100", lambda i: ("POST", "/loads/bulk", {
+            "content": "".join(json.dumps(dict(new_load(j), load_id=f"BULK-{i}-{j}")) + "\n" for j in range(100)),
+            "headers": dict(HEADERS, **{"content-type": "application/x-ndjson"})}), kind="write"),
+    ]
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    return samples[max(0, min(len(samples) - 1, math.ceil(p * len(samples)) - 1))]
+
+
+def run_scenario(client, scenario: Scenario, count: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    if scenario.setup is not None:
+        scenario.setup(client)
+
+    def one(i):
+        method, url, kwargs = scenario.request(i)
+        start = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code in scenario.expect, len(response.content)
+
+    if scenario.kind != "write":
+        for i in range(warmup):
+            one(i)
+    start = time.perf_counter()
+    if concurrency <= 1:
+        results = [one(i) for i in range(count)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "errors": sum(1 for r in results if not r[1]),
+        "throughput_rps": round(count / wall, 2) if wall else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_response_bytes": round(sum(r[2] for r in results) / count),
+    }
+
+
+def drive(client, size: int, args) -> Dict[str, Dict[str, Any]]:
+    counts = {"read": args.requests, "heavy": args.heavy_requests, "write": args.write_requests}
+    results = {}
+    for scenario in scenarios(size, args.webhook_mode):
+        if args.scenarios and scenario.name not in args.scenarios:
+            continue
+        if scenario.kind == "heavy" and size > args.heavy_max_size:
+            continue
+        count = counts[scenario.kind]
+        if count <= 0:
+            continue
+        results[scenario.name] = run_scenario(client, scenario, count, args.concurrency, args.warmup)
+        print(f"  {scenario.name:<32} {results[scenario.name]['throughput_rps']:>10} rps"
+              f"  p50 {results[scenario.name]['p50_ms']:>9.2f} ms  p99 {results[scenario.name]['p99_ms']:>9.2f} ms",
+              file=sys.stderr)
+    return results
+
+
+# -- environments ----------------------------------------------------------
+
+def storage_env(directory: str, storage: str) -> Dict[str, str]:
+    env = {
+        "LOADS_API_KEY": API_KEY,
+        "LOADS_DATA_PATH": os.path.join(directory, "loads.json"),
+        "CONVERSATIONS_DATA_PATH": os.path.join(directory, "conversations.json"),
+        "TRANSCRIPTS_PATH": os.path.join(directory, "transcripts"),
+        "CHANGES_PATH": os.path.join(directory, "changes"),
+    }
+    if storage == "journal":
+        env["CONVERSATIONS_STORAGE"] = "journal"
+    elif storage == "sqlite":
+        env["STORAGE_BACKEND"] = "sqlite"
+        env["SQLITE_DATA_PATH"] = os.path.join(directory, "bench.db")
+    return env
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run_inprocess_child(args):
+    """Entry point of the child process that hosts the app for in-process runs."""
+    os.environ.update(storage_env(args.child_dir, args.storage))
+    sys.path.insert(0, API_DIR)
+    from fastapi.testclient import TestClient
+    import app
+
+    start = time.perf_counter()
+    with TestClient(app.app) as client:
+        startup = time.perf_counter() - start
+        memory = rss_mb(os.getpid())
+        results = drive(client, args.child_size, args)
+    print(json.dumps({"startup_seconds": round(startup, 3), "rss_mb": memory, "scenarios": results}))
+
+
+def run_inprocess(directory: str, size: int, args) -> Dict[str, Any]:
+    argv = [sys.executable, os.path.abspath(__file__), "--child-dir", directory, "--child-size", str(size)]
+    argv += child_options(args)
+    out = subprocess.run(argv, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def child_options(args) -> List[str]:
+    options = [
+        "--storage", args.storage, "--webhook-mode", args.webhook_mode,
+        "--requests", str(args.requests), "--heavy-requests", str(args.heavy_requests),
+        "--write-requests", str(args.write_requests), "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup), "--heavy-max-size", str(args.heavy_max_size),
+    ]
+    if args.scenarios:
+        options += ["--scenarios", ",".join(args.scenarios)]
+    return options
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_uvicorn(directory: str, size: int, args) -> Dict[str, Any]:
+    import httpx
+
+    port = free_port()
+    env = dict(os.environ, **storage_env(directory, args.storage))
+    if args.webhook_mode == "async":
+        env["WEBHOOK_INGEST_MODE"] = "async"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        start = time.perf_counter()
+        with httpx.Client(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - start > args.timeout:
+                    raise RuntimeError("uvicorn did not become healthy in time")
+                time.sleep(0.1)
+            startup = time.perf_counter() - start
+            memory = rss_mb(server.pid)
+            results = drive(client, size, args)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"startup_seconds": round(startup, 3), "rss_mb": memory, "scenarios": results}
+
+
+# -- reporting -------------------------------------------------------------
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Print each scenario against the baseline, and list the ones it has no
+    figures for; returns the regressions found.
+    """
+    previous = {(run["size"], run["mode"]): run for run in baseline.get("runs", [])}
+    regressions = []
+    unmatched = []
+    print(f"\n{'size':>8} {'mode':<10} {'scenario':<32} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'vs baseline':>24}")
+    for run in results["runs"]:
+        before = previous.get((run["size"], run["mode"]), {}).get("scenarios", {})
+        for name, now in run["scenarios"].items():
+            note = ""
+            old = before.get(name)
+            if old:
+                p95_change = now["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+                rps_change = now["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+                note = f"p95 {p95_change:+.0%} rps {rps_change:+.0%}"
+                if p95_change > tolerance or rps_change < -tolerance:
+                    note += " REGRESSION"
+                    regressions.append(f"{run['size']} {run['mode']} {name}: {note}")
+            elif previous:
+                note = "no baseline"
+                unmatched.append(f"{run['size']} {run['mode']} {name}")
+            if now["errors"]:
+                note += f" ({now['errors']} errors)"
+            print(f"{run['size']:>8} {run['mode']:<10} {name:<32} {now['throughput_rps']:>10} "
+                  f"{now['p50_ms']:>9.2f} {now['p95_ms']:>9.2f} {now['p99_ms']:>9.2f} {note:>24}")
+    if unmatched:
+        print(f"\n{len(unmatched)} scenario(s) not in the baseline, so not checked for regressions "
+              f"(re-record it with --save-baseline):")
+        for line in unmatched:
+            print(f"  {line}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="records per collection, comma-separated")
+    parser.add_argument("--modes", default="inprocess,uvicorn")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], default="json")
+    parser.add_argument("--webhook-mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=None, help="only these scenarios")
+    parser.add_argument("--requests", type=int, default=500, help="requests per read scenario")
+    parser.add_argument("--heavy-requests", type=int, default=5, help="requests per full-listing scenario")
+    parser.add_argument("--heavy-max-size", type=int, default=100000, help="skip full listings above this size")
+    parser.add_argument("--write-requests", type=int, default=100, help="requests per write scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds allowed for startup and each request")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--child-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--child-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_dir:
+        run_inprocess_child(args)
+        return
+
+    runners = {"inprocess": run_inprocess, "uvicorn": run_uvicorn}
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "storage": args.storage,
+            "webhook_mode": args.webhook_mode,
+        },
+        "runs": [],
+    }
+    workdir = tempfile.mkdtemp(prefix="loads-bench-")
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            source = os.path.join(workdir, f"{size}-source")
+            print(f"generating {size} loads and conversations", file=sys.stderr)
+            synthetic.write_dataset(source, size, size)
+            for mode in args.modes.split(","):
+                # Each mode starts from an untouched copy, since the writes change the data
+                directory = os.path.join(workdir, f"{size}-{mode}")
+                shutil.copytree(source, directory)
+                print(f"{size} records, {mode}", file=sys.stderr)
+                run = runners[mode](directory, size, args)
+                results["runs"].append({"size": size, "mode": mode, **run})
+                shutil.rmtree(directory)
+            shutil.rmtree(source)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
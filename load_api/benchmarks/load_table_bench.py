@@ -0,0 +1,164 @@
+"""
+Build time, memory and query latency of LoadTable against loads held as a
+plain list of dicts.
+
+For each size, synthetic loads (see synthetic.py) are decoded from JSON one
+by one, as they would be when read from storage, into two layouts:
+
+- dict list:  one dict per load, every query a linear scan
+- load table: a LoadTable, with the decoded dicts dropped once packed
+
+Memory is what each layout keeps allocated, measured with tracemalloc.
+Build time is keying already decoded loads by id. Reload is bringing the
+table up to date with storage in which one load changed, as a worker does
+after another one writes, and all values is every load as a dict, as a
+JSON storage write needs them. Each GET /loads filter mix is then checked
+against the plain scan and timed, paged (limit 50) and in full, along with
+reading one load by id.
+
+    cd load_api && python benchmarks/load_table_bench.py --sizes 100000,1000000
+"""
+import argparse, gc, json, os, random, sys, time, tracemalloc
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import synthetic
+from load_table import LoadTable
+from timestamps import parse_timestamp
+
+QUERIES = [
+    ("no filter", {}),
+    ("equipment_type", {"equipment_type": "reefer"}),
+    ("origin substring", {"origin": "dallas"}),
+    ("min_rate", {"min_rate": 5000}),
+    ("pickup range", {"pickup_from": "2025-08-10T00:00:00Z", "pickup_to": "2025-08-17T00:00:00Z"}),
+    ("combined", {"equipment_type": "dry van", "min_rate": 3000, "pickup_from": "2025-08-01T00:00:00Z",
+                  "pickup_to": "2025-08-31T00:00:00Z", "destination": "tx"}),
+]
+
+# Checked against scan() before timing: the trigram index must find exactly
+# what a plain substring test does, for short, cased and missing queries too
+SUBSTRING_CHECKS = [
+    {"origin": "DAL"}, {"origin": "as, t"}, {"origin": "a"}, {"origin": "nowhere"},
+    {"destination": "ville"}, {"destination": "Atlanta, GA", "min_rate": 2000},
+]
+
+
+def decoded_loads(n: int):
+    """Synthetic loads with their own string objects, as json.load would give them."""
+    return (json.loads(json.dumps(load)) for load in synthetic.loads(n))
+
+
+def scan(loads: List[Dict[str, Any]], origin=None, destination=None, equipment_type=None,
+         pickup_from=None, pickup_to=None, min_rate=None, limit=None) -> List[Dict[str, Any]]:
+    """GET /loads filtering as a plain pass over every dict."""
+    lo = parse_timestamp(pickup_from) if pickup_from else None
+    hi = parse_timestamp(pickup_to) if pickup_to else None
+    results = []
+    for load in loads:
+        if equipment_type and (load.get("equipment_type") or "").lower() != equipment_type.lower():
+            continue
+        if min_rate is not None and not (load.get("loadboard_rate") is not None and load["loadboard_rate"] >= min_rate):
+            continue
+        if lo is not None or hi is not None:
+            pickup = parse_timestamp(load.get("pickup_datetime"))
+            if pickup is None or (lo is not None and pickup < lo) or (hi is not None and pickup > hi):
+                continue
+        if origin and origin.lower() not in load["origin"].lower():
+            continue
+        if destination and destination.lower() not in load["destination"].lower():
+            continue
+        results.append(load)
+        if limit is not None and len(results) >= limit:
+            break
+    return results
+
+
+def allocated_mb(build):
+    """(result of build(), MB it left allocated)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, (after - before) / 1e6
+
+
+def timed_ms(fn, repeat: int) -> float:
+    """Median wall time of fn() over `repeat` runs, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def bench(size: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    keys = [f"L-{random.randrange(size)}" for _ in range(1000)]
+    results = {}
+
+    loads, list_mb = allocated_mb(lambda: list(decoded_loads(size)))
+    by_key = {load["load_id"]: load for load in loads}
+    results["dict list"] = {"mb": list_mb, "build": timed_ms(lambda: {load["load_id"]: load for load in loads}, repeat)}
+    for name, query in QUERIES:
+        results["dict list"][name] = (
+            timed_ms(lambda: scan(loads, limit=50, **query), repeat),
+            timed_ms(lambda: scan(loads, **query), repeat),
+        )
+    results["dict list"]["reload"] = results["dict list"]["build"]
+    results["dict list"]["values"] = timed_ms(lambda: list(by_key.values()), repeat)
+    results["dict list"]["get"] = timed_ms(lambda: [by_key[k] for k in keys], repeat)
+
+    def tabled(source):
+        table = LoadTable()
+        table.update((load["load_id"], load) for load in source)
+        return table
+    table, table_mb = allocated_mb(lambda: tabled(decoded_loads(size)))
+    results["load table"] = {"mb": table_mb, "build": timed_ms(lambda: tabled(loads), repeat)}
+    changed = list(loads)
+    changed[size // 2] = dict(changed[size // 2], loadboard_rate=1)
+    results["load table"]["reload"] = timed_ms(lambda: table.reload(changed if table[changed[size // 2]["load_id"]] == loads[size // 2] else loads), repeat)
+    results["load table"]["values"] = timed_ms(lambda: list(table.values()), repeat)
+    table.reload(loads)
+    for query in [query for _, query in QUERIES] + SUBSTRING_CHECKS:
+        assert table.search(**query)[0] == scan(loads, **query), query
+        assert table.search(limit=50, **query)[0] == scan(loads, limit=50, **query), query
+    for name, query in QUERIES:
+        results["load table"][name] = (
+            timed_ms(lambda: table.search(limit=50, **query), repeat),
+            timed_ms(lambda: table.search(**query), repeat),
+        )
+    results["load table"]["get"] = timed_ms(lambda: [table[k] for k in keys], repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"\n{size} loads", flush=True)
+        results = bench(size, args.repeat)
+        layouts = list(results)
+        print(f"  {'':<28}" + "".join(f"{layout:>24}" for layout in layouts))
+        print(f"  {'bytes per load':<28}" + "".join(f"{results[l]['mb'] * 1e6 / size:>24.0f}" for l in layouts))
+        print(f"  {'build ms':<28}" + "".join(f"{results[l]['build']:>24.1f}" for l in layouts))
+        print(f"  {'reload ms':<28}" + "".join(f"{results[l]['reload']:>24.1f}" for l in layouts))
+        print(f"  {'all values ms':<28}" + "".join(f"{results[l]['values']:>24.1f}" for l in layouts))
+        print(f"  {'get x1000 ms':<28}" + "".join(f"{results[l]['get']:>24.2f}" for l in layouts))
+        for name, _ in QUERIES:
+            print(f"  {name + ' ms (page / all)':<28}" + "".join(
+                f"{results[l][name][0]:>12.2f} /{results[l][name][1]:>9.1f}" for l in layouts))
+
+
+if __name__ == "__main__":
+    main()
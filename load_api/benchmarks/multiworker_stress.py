@@ -0,0 +1,209 @@
+"""
+Stress test for running the API under several uvicorn worker processes.
+
+Starts `uvicorn app:app --workers N` over a fresh synthetic dataset and,
+from many concurrent connections spread across the workers:
+
+- creates loads with unique ids
+- deletes seeded loads, each exactly once
+- races several clients to create the same load ids, of which exactly one
+  create per id must win
+- sends webhook calls with unique call ids
+
+Then it asks the workers, over fresh connections, whether they all see the
+final counts, stops the server and reads storage directly. Every
+acknowledged write must be there, every acknowledged delete gone and
+nothing else changed. The change logs behind GET /changes must number
+their entries 1, 2, 3, ... across all workers and, replayed over the seed
+data, arrive at the same records. Exits non-zero if anything was lost.
+
+    cd load_api && python benchmarks/multiworker_stress.py --workers 4 --storage journal
+"""
+import argparse, os, random, shutil, subprocess, sys, tempfile, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, API_DIR)
+
+import httpx
+import synthetic
+from api_bench import HEADERS, free_port, storage_env
+
+SEED_LOADS = 500
+SEED_CONVERSATIONS = 200
+
+
+def wait_healthy(base_url: str, server: subprocess.Popen, timeout: float):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+def read_storage(directory: str, storage: str):
+    """Loads and conversations as persisted, read without going through the API."""
+    env = storage_env(directory, storage)
+    if storage == "sqlite":
+        from sqlite_storage import SqliteDatabase, SqliteStorage
+        database = SqliteDatabase(env["SQLITE_DATA_PATH"])
+        loads = SqliteStorage(database, "loads", key="load_id").load()
+        conversations = SqliteStorage(database, "conversations", key="conversation_id").load()
+        database.close()
+    elif storage == "journal":
+        from journal import JournalStorage
+        from store import JsonFileStorage
+        loads = JsonFileStorage(env["LOADS_DATA_PATH"]).load()
+        conversations = JournalStorage(env["CONVERSATIONS_DATA_PATH"], key="conversation_id").load()
+    else:
+        from store import JsonFileStorage
+        loads = JsonFileStorage(env["LOADS_DATA_PATH"]).load()
+        conversations = JsonFileStorage(env["CONVERSATIONS_DATA_PATH"]).load()
+    return loads, conversations
+
+
+def read_change_log(directory: str, collection: str):
+    """Entries of a collection's change log, as written by the workers."""
+    import json
+    with open(os.path.join(storage_env(directory, "json")["CHANGES_PATH"], f"{collection}.log"), "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], default="journal")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent connections")
+    parser.add_argument("--creates", type=int, default=300)
+    parser.add_argument("--deletes", type=int, default=200)
+    parser.add_argument("--contested", type=int, default=50, help="load ids raced by several clients")
+    parser.add_argument("--racers", type=int, default=4, help="clients racing per contested id")
+    parser.add_argument("--webhooks", type=int, default=300)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="loads-stress-")
+    synthetic.write_dataset(directory, SEED_LOADS, SEED_CONVERSATIONS)
+    seeded = {f"L-{i}" for i in range(SEED_LOADS)}
+    seed_conversations = {c["conversation_id"] for c in synthetic.conversations(SEED_CONVERSATIONS)}
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, **storage_env(directory, args.storage))
+    # Each webhook is saved before it is acknowledged
+    env["WEBHOOK_INGEST_MODE"] = "sync"
+    failures = []
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=API_DIR, env=env,
+    )
+    try:
+        wait_healthy(base_url, server, args.timeout)
+
+        tasks = [("create", f"NEW-{i}") for i in range(args.creates)]
+        tasks += [("delete", f"L-{i}") for i in random.sample(range(SEED_LOADS), args.deletes)]
+        tasks += [("create", f"RACE-{i}") for i in range(args.contested) for _ in range(args.racers)]
+        tasks += [("webhook", f"stress-call-{i}") for i in range(args.webhooks)]
+        random.shuffle(tasks)
+
+        limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+        with httpx.Client(base_url=base_url, headers=HEADERS, limits=limits, timeout=args.timeout) as client:
+            def run(task):
+                kind, key = task
+                if kind == "create":
+                    load = dict(synthetic.make_load(0, random.Random(key)), load_id=key)
+                    response = client.post("/loads", json=load)
+                elif kind == "delete":
+                    response = client.delete(f"/loads/{key}")
+                else:
+                    response = client.post("/webhook/extraction", json={"call_id": key, "mc_number": "070208"})
+                return kind, key, response.status_code
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.clients) as pool:
+                outcomes = list(pool.map(run, tasks))
+            elapsed = time.perf_counter() - start
+
+        created = {key for kind, key, status in outcomes if kind == "create" and status == 200}
+        deleted = {key for kind, key, status in outcomes if kind == "delete" and status == 200}
+        webhooks = {key for kind, key, status in outcomes if kind == "webhook" and status == 200}
+        statuses = Counter((kind, status) for kind, _, status in outcomes)
+        print(f"{len(tasks)} requests across {args.workers} workers in {elapsed:.1f}s: "
+              + ", ".join(f"{kind} {status} x{n}" for (kind, status), n in sorted(statuses.items())))
+
+        wins = Counter(key for key in created if key.startswith("RACE-"))
+        if len(wins) != args.contested or any(n != 1 for n in wins.values()):
+            failures.append(f"contested creates: expected exactly one winner for each of {args.contested} ids, got {len(wins)} ids won")
+        for kind, _, status in outcomes:
+            if status >= 500:
+                failures.append(f"{kind} returned {status}")
+                break
+
+        expected_loads = (seeded - deleted) | created
+        expected_conversations = SEED_CONVERSATIONS + len(webhooks)
+
+        # Every worker should see the final state; fresh connections land on different workers
+        views = Counter()
+        for _ in range(args.workers * 8):
+            stats = httpx.get(f"{base_url}/stats", headers=HEADERS, timeout=args.timeout).json()
+            views[(stats["loads"]["total"], stats["conversations"]["total"])] += 1
+        if set(views) != {(len(expected_loads), expected_conversations)}:
+            failures.append(f"workers disagree or are stale: (loads, conversations) seen {dict(views)}, "
+                            f"expected {(len(expected_loads), expected_conversations)}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    loads, conversations = read_storage(directory, args.storage)
+    stored_loads = [load["load_id"] for load in loads]
+    stored_conversations = {c["conversation_id"] for c in conversations}
+    if len(stored_loads) != len(set(stored_loads)):
+        failures.append("duplicate load ids in storage")
+    missing = expected_loads - set(stored_loads)
+    extra = set(stored_loads) - expected_loads
+    if missing:
+        failures.append(f"{len(missing)} acknowledged loads missing from storage, e.g. {sorted(missing)[:5]}")
+    if extra:
+        failures.append(f"{len(extra)} loads in storage that should be gone, e.g. {sorted(extra)[:5]}")
+    lost_webhooks = webhooks - stored_conversations
+    if lost_webhooks:
+        failures.append(f"{len(lost_webhooks)} acknowledged webhook conversations lost, e.g. {sorted(lost_webhooks)[:5]}")
+    if len(stored_conversations) != expected_conversations:
+        failures.append(f"{len(stored_conversations)} conversations stored, expected {expected_conversations}")
+
+    # The change logs, replayed over the seed data, must arrive at what is stored
+    for collection, seed, stored in (("loads", seeded, set(stored_loads)),
+                                     ("conversations", seed_conversations, stored_conversations)):
+        entries = read_change_log(directory, collection)
+        if [e["seq"] for e in entries] != list(range(1, len(entries) + 1)):
+            failures.append(f"{collection} change log sequence numbers are not 1..{len(entries)} in order")
+        replayed = set(seed)
+        for entry in entries:
+            if entry["op"] == "deleted":
+                replayed.discard(entry["id"])
+            else:
+                replayed.add(entry["id"])
+        if replayed != stored:
+            failures.append(f"{collection} change log replays to {len(replayed)} records, storage has {len(stored)}")
+    shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print("FAILED")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"OK: {len(expected_loads)} loads and {expected_conversations} conversations, "
+          f"no lost or duplicated writes ({args.storage} storage)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for primary-key operations on store.Collection.
+
+Times get, existence check, upsert of an existing key and insert+delete
+against an in-memory Storage, so only the collection's own work is
+measured. Per-op latency should stay flat as the collection grows.
+
+    cd load_api && python benchmarks/pk_ops.py --sizes 1000,10000,100000,1000000
+"""
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import Collection, Storage
+
+
+class MemoryStorage(Storage):
+    def __init__(self, records):
+        self.records = records
+
+    def signature(self):
+        return 0
+
+    def load(self):
+        return self.records
+
+    def write(self, records, ops):
+        return None
+
+
+def make_load(i):
+    return {
+        "load_id": f"L-{i}",
+        "origin": "Dallas, TX",
+        "destination": "Denver, CO",
+        "pickup_datetime": "2025-08-15T09:00:00Z",
+        "delivery_datetime": "2025-08-16T17:00:00Z",
+        "equipment_type": "Dry Van",
+        "loadboard_rate": 1800,
+    }
+
+
+def time_ops(fn, args):
+    """Mean and p99 latency of fn(arg) over args, in microseconds."""
+    samples = []
+    for arg in args:
+        start = time.perf_counter_ns()
+        fn(arg)
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return sum(samples) / len(samples) / 1000, samples[int(len(samples) * 0.99)] / 1000
+
+
+def bench(size, ops):
+    collection = Collection(MemoryStorage([make_load(i) for i in range(size)]), key="load_id")
+    collection.refresh()
+    keys = [f"L-{random.randrange(size)}" for _ in range(ops)]
+    results = {
+        "get": time_ops(collection.get, keys),
+        "exists": time_ops(lambda k: k in collection, keys),
+        "upsert": time_ops(lambda k: collection.upsert(dict(make_load(0), load_id=k)), keys),
+    }
+    fresh = [make_load(size + i) for i in range(ops)]
+    results["insert"] = time_ops(collection.insert, fresh)
+    results["delete"] = time_ops(collection.delete, [r["load_id"] for r in fresh])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--ops", type=int, default=20000, help="operations timed per size and kind")
+    args = parser.parse_args()
+
+    kinds = ["get", "exists", "upsert", "insert", "delete"]
+    print(f"{'records':>10} " + " ".join(f"{k + ' us (p99)':>20}" for k in kinds))
+    for size in (int(s) for s in args.sizes.split(",")):
+        results = bench(size, args.ops)
+        print(f"{size:>10} " + " ".join(f"{results[k][0]:>11.2f} ({results[k][1]:>5.1f})" for k in kinds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Synthetic loads and conversations shaped like loads.json and
+conversations.json, for benchmarks.
+
+Records are generated deterministically from a seed, so two runs at the same
+size see the same data. To write a dataset to disk:
+
+    cd load_api && python benchmarks/synthetic.py --loads 100000 --conversations 100000 --out /tmp/bench-data
+"""
+import argparse, json, os, random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator
+
+CITIES = [
+    "Dallas, TX", "Denver, CO", "Stockton, CA", "Portland, OR", "Atlanta, GA", "Chicago, IL",
+    "Houston, TX", "Phoenix, AZ", "Memphis, TN", "Columbus, OH", "Kansas City, MO", "Nashville, TN",
+    "Los Angeles, CA", "Seattle, WA", "Miami, FL", "Charlotte, NC", "Salt Lake City, UT", "Omaha, NE",
+    "Indianapolis, IN", "Louisville, KY", "Jacksonville, FL", "Reno, NV", "Boise, ID", "Laredo, TX",
+]
+EQUIPMENT = ["Dry Van", "Reefer", "Flatbed", "Box Truck"]
+COMMODITIES = ["Produce", "Dairy", "Steel", "Electronics", "Paper", "Lumber", "Beverages", "Auto Parts"]
+NOTES = ["Live load", "Drop and hook", "Maintain 34°F", "Tarps required", "Appointment only", None]
+DIMENSIONS = ["48x40 pallets", "Std pallets", "Bundled", "Floor loaded"]
+CLASSIFICATIONS = ["Successful", "Not Successful", "Unsuccessful", None]
+PRIORITIES = ["high", "medium", "low"]
+
+EPOCH = datetime(2025, 8, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_load(i: int, rng: random.Random) -> Dict[str, Any]:
+    origin, destination = rng.sample(CITIES, 2)
+    pickup = EPOCH + timedelta(hours=rng.randrange(24 * 90))
+    return {
+        "load_id": f"L-{i}",
+        "origin": origin,
+        "destination": destination,
+        "pickup_datetime": _iso(pickup),
+        "delivery_datetime": _iso(pickup + timedelta(hours=rng.randrange(8, 72))),
+        "equipment_type": rng.choice(EQUIPMENT),
+        "loadboard_rate": rng.randrange(600, 6000, 50),
+        "notes": rng.choice(NOTES),
+        "weight": rng.randrange(5000, 45000, 500),
+        "commodity_type": rng.choice(COMMODITIES),
+        "num_of_pieces": rng.randrange(1, 30),
+        "miles": rng.randrange(50, 2500),
+        "dimensions": rng.choice(DIMENSIONS),
+    }
+
+
+def make_conversation(i: int, rng: random.Random) -> Dict[str, Any]:
+    pickup, delivery = rng.sample(CITIES, 2)
+    classification = rng.choice(CLASSIFICATIONS)
+    notes = "Customer is a repeat client. Prefers early morning pickups."
+    if classification:
+        notes = f"Load Status: {classification}\n\n{notes}"
+    return {
+        "conversation_id": f"conv_{i:08d}",
+        "customer_name": f"Carrier {rng.randrange(5000)} Trucking LLC",
+        "customer_phone": f"+1-555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+        "customer_email": f"dispatch{i}@example.com",
+        "mc_number": f"{rng.randrange(10000, 999999):06d}",
+        "pickup_location": pickup,
+        "delivery_location": delivery,
+        "equipment_needed": rng.choice(EQUIPMENT),
+        "rate_discussed": rng.randrange(600, 6000, 50),
+        "miles": rng.randrange(50, 2500),
+        "agent_notes": notes,
+        "follow_up_needed": rng.random() < 0.2,
+        "customer_priority": rng.choice(PRIORITIES),
+        "timestamp": _iso(EPOCH + timedelta(seconds=rng.randrange(90 * 86400))),
+    }
+
+
+def loads(n: int, seed: int = 1) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return (make_load(i, rng) for i in range(n))
+
+
+def conversations(n: int, seed: int = 2) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return (make_conversation(i, rng) for i in range(n))
+
+
+def write_json_array(path: str, records: Iterator[Dict[str, Any]]):
+    """Write records as a JSON array one at a time, without holding them all in memory."""
+    with open(path, "w") as f:
+        f.write("[")
+        for i, record in enumerate(records):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(record))
+        f.write("]\n")
+
+
+def write_dataset(directory: str, n_loads: int, n_conversations: int):
+    """Write loads.json and conversations.json into `directory`; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    loads_path = os.path.join(directory, "loads.json")
+    conversations_path = os.path.join(directory, "conversations.json")
+    write_json_array(loads_path, loads(n_loads))
+    write_json_array(conversations_path, conversations(n_conversations))
+    return loads_path, conversations_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loads", type=int, default=1000)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--out", required=True, help="directory to write loads.json and conversations.json to")
+    args = parser.parse_args()
+    for path in write_dataset(args.out, args.loads, args.conversations):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
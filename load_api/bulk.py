@@ -0,0 +1,59 @@
+import csv, io
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CSV_MEDIA_TYPE = "text/csv"
+
+
+def ndjson_rows(body: IO[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """(row number, line) for each non-blank line of an NDJSON body, read a line at a time."""
+    row = 0
+    for line in body:
+        if line.strip():
+            row += 1
+            yield row, line
+
+
+def csv_rows(body: IO[bytes]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    (row number, {column: value}) for each row of a CSV body with a header
+    line. The body is decoded as it is read; a quoted value may span lines.
+    Empty cells are left out, so optional fields read as absent.
+    """
+    text = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+    try:
+        for row, values in enumerate(csv.DictReader(text), 1):
+            yield row, {name: value for name, value in values.items()
+                        if name is not None and value not in ("", None)}
+    finally:
+        # The wrapper would close the body with it
+        text.detach()
+
+
+def csv_stream(records: Iterable[Dict[str, Any]], fields: List[str],
+               chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Encode records as CSV with a header line of `fields`, pulling them
+    lazily; missing and null values are written as empty cells. Rows are
+    grouped into chunks of about `chunk_size` bytes, as ndjson_stream does.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    for record in records:
+        writer.writerow(["" if record.get(name) is None else record[name] for name in fields])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def body_format(content_type: str) -> Optional[str]:
+    """"ndjson" or "csv" for a request Content-Type, or None if it is neither."""
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    if content_type in (CSV_MEDIA_TYPE, "application/csv"):
+        return "csv"
+    return None
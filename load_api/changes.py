@@ -0,0 +1,198 @@
+import json, os, threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from encoding import dumps
+
+
+class ChangeLog:
+    """
+    A collection's recent changes, numbered, so a client holding a copy of
+    the collection can keep it current by fetching only what changed.
+
+    Every commit made through the collection appends one entry per record
+    it touched, in commit order:
+
+        {"seq": 41, "op": "created" | "updated", "id": ..., "record": {...}}
+        {"seq": 42, "op": "deleted", "id": ...}
+
+    Entries are JSON lines appended to the file at `path`. Appends happen
+    under the collection's write lock, which every process writing the
+    collection shares, so sequence numbers are unique and gap-free across
+    processes and survive restarts. Each process keeps the last `retention`
+    entries in memory, already encoded, and picks up other processes' lines
+    by reading the file past the offset it has seen.
+
+    Once the file holds twice `retention` entries, the writer replaces it
+    with the newest `retention`. A client whose position is older than the
+    oldest entry kept has to download the collection again.
+
+    Like storage, appends are flushed to the OS under the write lock and
+    fsynced after it is released; concurrent writers share fsyncs. Changes
+    made by editing the data files by hand are not logged.
+    """
+
+    def __init__(self, path: str, retention: int = 10000):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # Encoded entries, oldest first; _first is the seq of _lines[0], or
+        # of the next entry when there are none
+        self._lines: List[bytes] = []
+        self._first = 1
+        self._file_lines = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._written = 0
+        self._synced = 0
+        # Called after each append, when set, from the appending thread
+        self.on_append: Optional[Callable[[], None]] = None
+
+    # -- reading (caller holds self._lock) -------------------------------
+
+    def _catch_up(self):
+        """Read entries other processes appended since we last looked."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Replaced by compaction: start over from the new file
+            self._inode = st.st_ino
+            self._offset = 0
+            self._file_lines = 0
+            self._lines = []
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line without its newline is still being written, or was torn by a crash
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].splitlines()
+        if lines and not self._lines:
+            self._first = json.loads(lines[0])["seq"]
+        self._lines.extend(lines)
+        self._file_lines += len(lines)
+        self._offset += end
+        self._trim()
+
+    def _trim(self):
+        excess = len(self._lines) - self.retention
+        if excess > 0:
+            del self._lines[:excess]
+            self._first += excess
+
+    @property
+    def _latest(self) -> int:
+        return self._first + len(self._lines) - 1
+
+    # -- writing ---------------------------------------------------------
+
+    def _open(self) -> int:
+        """The fd to append to. Caller holds self._lock and the write lock, and has caught up."""
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        elif os.fstat(self._fd).st_ino != self._inode:
+            # Another process compacted the file, our appends included
+            with self._sync_lock:
+                os.close(self._fd)
+                self._fd = None
+                self._synced = self._written
+            return self._open()
+        # Anything past the offset read is a line torn by a crash mid-append
+        if os.fstat(self._fd).st_size > self._offset:
+            os.ftruncate(self._fd, self._offset)
+        return self._fd
+
+    def append(self, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]], key: str):
+        """
+        Log the (old, new) pairs of one commit. Caller holds the
+        collection's write lock.
+        """
+        with self._lock:
+            self._catch_up()
+            seq = self._latest
+            lines = []
+            for old, new in changes:
+                if old is None and new is None:
+                    continue
+                seq += 1
+                if new is None:
+                    entry = {"seq": seq, "op": "deleted", "id": old[key]}
+                else:
+                    entry = {"seq": seq, "op": "created" if old is None else "updated", "id": new[key], "record": new}
+                lines.append(dumps(entry))
+            if not lines:
+                return
+            data = b"".join(line + b"\n" for line in lines)
+            fd = self._open()
+            os.write(fd, data)
+            self._offset += len(data)
+            self._lines.extend(lines)
+            self._file_lines += len(lines)
+            self._written += 1
+            self._trim()
+            if self._file_lines >= 2 * self.retention:
+                self._compact()
+        if self.on_append is not None:
+            self.on_append()
+
+    def _compact(self):
+        # Caller holds self._lock and the write lock; _lines is the newest `retention`
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(line + b"\n" for line in self._lines))
+            f.flush()
+            os.fsync(f.fileno())
+        with self._sync_lock:
+            os.replace(tmp_path, self.path)
+            os.close(self._fd)
+            self._fd = None
+            self._synced = self._written
+        self._inode = os.stat(self.path).st_ino
+        self._offset = os.path.getsize(self.path)
+        self._file_lines = len(self._lines)
+
+    def sync(self):
+        """fsync everything appended so far. Called without the write lock held."""
+        if self._synced >= self._written:
+            return
+        with self._sync_lock:
+            target = self._written
+            if self._synced >= target or self._fd is None:
+                return
+            os.fsync(self._fd)
+            self._synced = target
+
+    # -- querying --------------------------------------------------------
+
+    def latest(self) -> int:
+        """Sequence number of the newest entry; 0 before anything was logged."""
+        with self._lock:
+            self._catch_up()
+            return self._latest
+
+    def since(self, seq: int, limit: int) -> Tuple[Optional[List[bytes]], int, int]:
+        """
+        (up to `limit` encoded entries after `seq`, oldest seq kept, latest
+        seq). The entries are None when `seq` is older than what is kept,
+        or newer than anything logged, so the caller's copy can't be
+        brought up to date from here.
+        """
+        with self._lock:
+            self._catch_up()
+            latest = self._latest
+            if seq < self._first - 1 or seq > latest:
+                return None, self._first, latest
+            start = seq - self._first + 1
+            return self._lines[start:start + limit], self._first, latest
+
+    def close(self):
+        with self._lock, self._sync_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,68 @@
+import re
+from typing import Any, Dict, Optional
+
+
+BOOKED = "booked"
+NOT_BOOKED = "not_booked"
+UNKNOWN = "unknown"
+LOAD_STATUSES = (BOOKED, NOT_BOOKED, UNKNOWN)
+
+_BOOKED_WORDS = {"booked", "successful", "success"}
+_NOT_BOOKED_WORDS = {"not_booked", "unsuccessful", "failed", "declined", "rejected"}
+
+
+def normalize_load_status(value: Optional[str]) -> str:
+    """
+    Map a classification such as "successful", "Not Successful" or "booked"
+    to one of LOAD_STATUSES.
+    """
+    text = re.sub(r"[\s-]+", "_", (value or "").strip().lower())
+    if text in _BOOKED_WORDS:
+        return BOOKED
+    if text in _NOT_BOOKED_WORDS or text.startswith("not_"):
+        return NOT_BOOKED
+    return UNKNOWN
+
+
+def load_status_from_notes(notes: Optional[str]) -> str:
+    """Recover the status from the "Load Status: ..." part of older agent_notes."""
+    notes = notes or ""
+    if "Load Status: Successful" in notes:
+        return BOOKED
+    if "Load Status: Not" in notes or "Load Status: Unsuccessful" in notes:
+        return NOT_BOOKED
+    return UNKNOWN
+
+
+def booking_status(conversation: Dict[str, Any]) -> str:
+    """The conversation's load_status, falling back to agent_notes for records saved without one."""
+    status = conversation.get("load_status")
+    if status in LOAD_STATUSES:
+        return status
+    return load_status_from_notes(conversation.get("agent_notes"))
+
+
+def normalize_mc_number(value) -> Optional[str]:
+    """
+    Digits of an MC number, so "MC-070208" and "mc 070208" both become
+    "070208". Leading zeros are kept. None if there are no digits.
+    """
+    if value is None:
+        return None
+    digits = re.sub(r"\D", "", str(value))
+    return digits or None
+
+
+def normalize_conversation(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A copy of `record` with load_status normalized and mc_digits set from
+    mc_number. A status already set is normalized; a missing one is read
+    from agent_notes. mc_number itself is kept as the caller wrote it.
+    """
+    normalized = dict(record)
+    status = record.get("load_status")
+    normalized["load_status"] = (
+        normalize_load_status(status) if status else load_status_from_notes(record.get("agent_notes"))
+    )
+    normalized["mc_digits"] = normalize_mc_number(record.get("mc_number"))
+    return normalized
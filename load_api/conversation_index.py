@@ -0,0 +1,186 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from conversation_fields import booking_status, normalize_mc_number
+from store import CollectionListener
+
+
+class ConversationIndex(CollectionListener):
+    """
+    Conversations kept in newest-first order, maintained by the conversations
+    store.
+
+    `_by_time` holds (timestamp, conversation_id) ascending, so walking it
+    backwards yields newest first, with ties broken by conversation_id,
+    descending. A page therefore costs O(page size) plus whatever the filter
+    skips, rather than a full sort. Keys depend only on the records, so the
+    order, and a cursor naming a key, are the same in every worker and
+    across restarts.
+
+    The same keys are also kept per load_status and per normalized mc_number,
+    so filtering on either walks only the conversations that have that value.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, tuple] = {}
+        self._by_time: List[tuple] = []
+        self._by_status: Dict[str, List[tuple]] = {}
+        self._by_mc: Dict[str, List[tuple]] = {}
+        self._newest: Optional[List[Dict[str, Any]]] = None
+
+    def reset(self, records):
+        with self._lock:
+            self._entries = {}
+            self._by_time = []
+            self._by_status = {}
+            self._by_mc = {}
+            self._newest = None
+            for record in records:
+                self.added(record)
+
+    @staticmethod
+    def _field_values(record) -> Tuple[str, Optional[str]]:
+        return booking_status(record), normalize_mc_number(record.get("mc_number"))
+
+    @staticmethod
+    def _remove_sorted(items: List[tuple], key: tuple):
+        i = bisect_left(items, key)
+        if i < len(items) and items[i] == key:
+            del items[i]
+
+    def _insert(self, record):
+        key = (record.get("timestamp") or "", record["conversation_id"])
+        self._entries[record["conversation_id"]] = (record, key)
+        insort(self._by_time, key)
+        status, mc_number = self._field_values(record)
+        insort(self._by_status.setdefault(status, []), key)
+        if mc_number is not None:
+            insort(self._by_mc.setdefault(mc_number, []), key)
+        self._newest = None
+
+    def _remove(self, conversation_id):
+        entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            return
+        record, key = entry
+        self._newest = None
+        self._remove_sorted(self._by_time, key)
+        status, mc_number = self._field_values(record)
+        for index, value in ((self._by_status, status), (self._by_mc, mc_number)):
+            keys = index.get(value)
+            if keys is not None:
+                self._remove_sorted(keys, key)
+                if not keys:
+                    del index[value]
+
+    def _keys(self, load_status: Optional[str], mc_number: Optional[str]) -> List[tuple]:
+        """
+        The smallest newest-first key list covering the indexed filters.
+        Caller holds self._lock and still checks any filter not chosen here.
+        """
+        candidates = [self._by_time]
+        if load_status is not None:
+            candidates.append(self._by_status.get(load_status, []))
+        if mc_number is not None:
+            candidates.append(self._by_mc.get(normalize_mc_number(mc_number), []))
+        return min(candidates, key=len)
+
+    @staticmethod
+    def _indexed_match(load_status, mc_number, match):
+        """`match` plus exact checks for the indexed filters, or None if nothing needs checking."""
+        if load_status is None and mc_number is None:
+            return match
+        mc_number = normalize_mc_number(mc_number) if mc_number is not None else None
+
+        def check(record):
+            status, mc = ConversationIndex._field_values(record)
+            if load_status is not None and status != load_status:
+                return False
+            if mc_number is not None and mc != mc_number:
+                return False
+            return match is None or match(record)
+
+        return check
+
+    def added(self, record):
+        with self._lock:
+            self._insert(record)
+
+    def removed(self, record):
+        with self._lock:
+            self._remove(record["conversation_id"])
+
+    def replaced(self, old, new):
+        with self._lock:
+            self._remove(old["conversation_id"])
+            self._insert(new)
+
+    def newest_first(
+        self,
+        match: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+        load_status: Optional[str] = None,
+        mc_number: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        Conversations with the given load_status and mc_number that `match`
+        accepts, newest first.
+
+        Returns (results, next_after). `after` is a (timestamp,
+        conversation_id) key previously returned as next_after; it stays
+        valid if that record is deleted, and in any worker.
+        """
+        results = []
+        last = None
+        match = self._indexed_match(load_status, mc_number, match)
+        with self._lock:
+            keys = self._keys(load_status, mc_number)
+            i = len(keys) if after is None else bisect_left(keys, tuple(after))
+            while i > 0:
+                i -= 1
+                key = keys[i]
+                record = self._entries[key[1]][0]
+                if match is not None and not match(record):
+                    continue
+                if limit is not None and len(results) == limit:
+                    return results, last
+                results.append(record)
+                last = key
+        return results, None
+
+    def iter_newest_first(
+        self,
+        match: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        after: Optional[Tuple[str, str]] = None,
+        load_status: Optional[str] = None,
+        mc_number: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield the conversations newest_first() would return, without
+        holding the lock while iterating. Unfiltered, this walks a newest-first
+        snapshot that is built once per change and shared by every reader; an
+        indexed filter copies just its own matches.
+        """
+        match = self._indexed_match(load_status, mc_number, match)
+        with self._lock:
+            keys = self._keys(load_status, mc_number)
+            end = len(keys) if after is None else bisect_left(keys, tuple(after))
+            if keys is self._by_time:
+                if self._newest is None:
+                    self._newest = [self._entries[key[1]][0] for key in reversed(self._by_time)]
+                newest = self._newest
+                start = len(keys) - end
+            else:
+                newest = [self._entries[key[1]][0] for key in reversed(keys[:end])]
+                start = 0
+
+        def matches():
+            for i in range(start, len(newest)):
+                record = newest[i]
+                if match is None or match(record):
+                    yield record
+
+        return matches()
@@ -0,0 +1,244 @@
+import heapq, math, re, threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from store import CollectionListener
+
+SEARCH_FIELDS = (
+    "conversation_summary", "agent_notes", "load_requirements",
+    "pickup_location", "delivery_location", "equipment_needed",
+)
+TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased runs of letters and digits: "Follow-up, MC-070208" -> follow, up, mc, 070208."""
+    return TOKEN.findall(text.casefold())
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    A query as OR'ed groups of AND'ed terms. Words are AND'ed; an uppercase
+    OR starts another group; an uppercase AND is allowed and ignored.
+    "reefer miami OR reefer tampa" -> [[reefer, miami], [reefer, tampa]].
+    """
+    groups: List[List[str]] = [[]]
+    for word in query.split():
+        if word == "OR":
+            groups.append([])
+        elif word != "AND":
+            groups[-1].extend(tokenize(word))
+    return [list(dict.fromkeys(group)) for group in groups if group]
+
+
+class Postings:
+    """Documents containing one term, ascending, with the term's count in each."""
+
+    __slots__ = ("docs", "counts")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.counts = array("H")
+
+    def count(self, doc: int) -> int:
+        i = bisect_left(self.docs, doc)
+        return self.counts[i] if i < len(self.docs) and self.docs[i] == doc else 0
+
+
+class ConversationSearch(CollectionListener):
+    """
+    Inverted index over the conversations' free-text fields (SEARCH_FIELDS),
+    maintained by the conversations store and ranked with BM25.
+
+    Every version of a record gets a fresh document number, so postings are
+    only ever appended to and stay sorted. Removing or replacing a record
+    marks its old number dead and takes its terms out of the document
+    frequencies; dead entries are skipped when scoring and dropped by a
+    rebuild once they outnumber live ones.
+
+    - `_postings`:  term -> Postings
+    - `_df`:        term -> live documents containing it
+    - `_records`:   document number -> record, None once dead
+    - `_lengths`:   document number -> token count
+    - `_docs`:      conversation_id -> live document number
+    """
+
+    COMPACT_MIN_DEAD = 4096
+    TOKEN_CACHE_SIZE = 65536
+
+    def __init__(self, key: str = "conversation_id", k1: float = 1.2, b: float = 0.75):
+        self.key = key
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._token_cache: Dict[Any, List[str]] = {}
+        self._clear()
+
+    def _clear(self):
+        self._postings: Dict[str, Postings] = {}
+        self._df: Dict[str, int] = {}
+        self._records: List[Optional[Dict[str, Any]]] = []
+        self._lengths = array("I")
+        self._docs: Dict[str, int] = {}
+        self._total_length = 0
+        self._dead = 0
+
+    def _terms(self, record) -> List[str]:
+        # Locations, equipment and stock notes repeat across conversations,
+        # so short field values' tokens are memoized (up to TOKEN_CACHE_SIZE)
+        tokens = []
+        cache = self._token_cache
+        for value in map(record.get, SEARCH_FIELDS):
+            if value is None:
+                continue
+            found = cache.get(value)
+            if found is None:
+                found = tokenize(str(value))
+                if len(cache) < self.TOKEN_CACHE_SIZE and len(found) <= 16:
+                    cache[value] = found
+            tokens += found
+        return tokens
+
+    # -- maintenance (caller holds self._lock) ---------------------------
+
+    def _add(self, record):
+        doc = len(self._records)
+        tokens = self._terms(record)
+        postings_of, df = self._postings, self._df
+        for term, count in Counter(tokens).items():
+            postings = postings_of.get(term)
+            if postings is None:
+                postings = postings_of[term] = Postings()
+                df[term] = 0
+            postings.docs.append(doc)
+            postings.counts.append(min(count, 0xFFFF))
+            df[term] += 1
+        self._records.append(record)
+        self._lengths.append(len(tokens))
+        self._docs[record[self.key]] = doc
+        self._total_length += len(tokens)
+
+    def _remove(self, key: str):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        record = self._records[doc]
+        for term in set(self._terms(record)):
+            self._df[term] -= 1
+        self._records[doc] = None
+        self._total_length -= self._lengths[doc]
+        self._dead += 1
+        if self._dead > self.COMPACT_MIN_DEAD and self._dead > len(self._docs):
+            self._rebuild([r for r in self._records if r is not None])
+
+    def _rebuild(self, records: Iterable[Dict[str, Any]]):
+        self._clear()
+        for record in records:
+            self._add(record)
+
+    # -- CollectionListener ----------------------------------------------
+
+    def reset(self, records):
+        with self._lock:
+            self._rebuild(records)
+
+    def added(self, record):
+        with self._lock:
+            self._add(record)
+
+    def removed(self, record):
+        with self._lock:
+            self._remove(record[self.key])
+
+    def replaced(self, old, new):
+        with self._lock:
+            self._remove(old[self.key])
+            self._add(new)
+
+    # -- querying (caller holds self._lock) -----------------------------
+
+    def _weights(self, term: str, idf: float, norms: Dict[int, float],
+                 within: Optional[Dict[int, float]] = None) -> Dict[int, float]:
+        """
+        BM25 weight of `term` in each live document containing it, only for
+        documents in `within` if given. When `within` is much smaller than
+        the term's postings its documents are looked up instead of walking
+        the postings. `norms` caches the length normalization per length.
+        """
+        postings = self._postings.get(term)
+        if postings is None:
+            return {}
+        k1, b, lengths, records = self.k1, self.b, self._lengths, self._records
+        average = self._total_length / len(self._docs)
+        scale = idf * (k1 + 1)
+        if within is not None and len(postings.docs) > 16 * len(within):
+            pairs = ((doc, postings.count(doc)) for doc in within)
+        else:
+            pairs = zip(postings.docs, postings.counts)
+        weights = {}
+        for doc, n in pairs:
+            if not n or records[doc] is None or (within is not None and doc not in within):
+                continue
+            length = lengths[doc]
+            norm = norms.get(length)
+            if norm is None:
+                norm = norms[length] = k1 * (1 - b + b * length / average)
+            weights[doc] = scale * n / (n + norm)
+        return weights
+
+    def _group_scores(self, group: List[str], idf: Dict[str, float], norms: Dict[int, float]) -> Dict[int, float]:
+        """Summed weights of the documents containing every term of `group`, rarest term first."""
+        scores = None
+        for term in sorted(group, key=lambda t: self._df.get(t, 0)):
+            weights = self._weights(term, idf[term], norms, within=scores)
+            scores = weights if scores is None else {doc: scores[doc] + w for doc, w in weights.items()}
+            if not scores:
+                break
+        return scores or {}
+
+    def search(self, query: str, limit: Optional[int] = None,
+               after: Optional[Tuple[float, str]] = None) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[float, str]]]:
+        """
+        Records matching `query` (see parse_query), best first, ties by key.
+        A record found by one OR group is scored on every query term it
+        contains. Returns (page, total matches, position to pass as `after`
+        for the next page, or None on the last page).
+        """
+        groups = parse_query(query)
+        with self._lock:
+            live = len(self._docs)
+            if not groups or not live:
+                return [], 0, None
+            terms = list(dict.fromkeys(term for group in groups for term in group))
+            idf = {term: math.log(1 + (live - self._df.get(term, 0) + 0.5) / (self._df.get(term, 0) + 0.5))
+                   for term in terms}
+            norms: Dict[int, float] = {}
+            if len(groups) == 1:
+                scores = self._group_scores(groups[0], idf, norms)
+            else:
+                scores = {}
+                for group in groups:
+                    scores.update(dict.fromkeys(self._group_scores(group, idf, norms), 0.0))
+                for term in terms:
+                    for doc, w in self._weights(term, idf[term], norms, within=scores).items():
+                        scores[doc] += w
+            total = len(scores)
+            records, key = self._records, self.key
+            if after is not None:
+                best, last = after
+                scores = {doc: s for doc, s in scores.items()
+                          if s < best or (s == best and records[doc][key] > last)}
+            if limit is not None and len(scores) > limit + 1:
+                # Only entries scoring at least the (limit + 1)th best need ordering by key
+                threshold = heapq.nlargest(limit + 1, scores.values())[-1]
+                scores = {doc: s for doc, s in scores.items() if s >= threshold}
+            ranked = sorted((-s, records[doc][key], doc) for doc, s in scores.items())
+            page = ranked if limit is None else ranked[:limit]
+            next_after = (-page[-1][0], page[-1][1]) if limit is not None and len(ranked) > limit else None
+            return [records[doc] for _, _, doc in page], total, next_after
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"documents": len(self._docs), "terms": sum(1 for n in self._df.values() if n), "dead": self._dead}
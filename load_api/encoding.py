@@ -0,0 +1,136 @@
+import json, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from store import CollectionListener
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Compact JSON as UTF-8, the same text FastAPI's JSONResponse renders.
+    Uses orjson when it is installed, falling back for anything it refuses
+    (ints wider than 64 bits, non-string keys, lone surrogates). Strings
+    that can't be UTF-8 encoded, such as a lone surrogate from a \ud800
+    escape, are written as escapes again.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            pass
+    try:
+        return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    except UnicodeEncodeError:
+        return json.dumps(value, allow_nan=False, separators=(",", ":")).encode()
+
+
+def list_body(fragments: Iterable[bytes], next_cursor: Optional[str], **extra: Any) -> bytes:
+    """A {"results": [...], "next_cursor": ..., **extra} page from already-encoded records."""
+    tail = b"".join(b"," + dumps(name) + b":" + dumps(value) for name, value in extra.items())
+    return b'{"results":[' + b",".join(fragments) + b'],"next_cursor":' + dumps(next_cursor) + tail + b"}"
+
+
+class FragmentCache(CollectionListener):
+    """
+    Each record's encoded JSON, keyed by primary key and kept current by a
+    store: a change drops the record's entry and the next read encodes it
+    again. At most `max_bytes` of JSON is kept, least recently used first
+    out.
+
+    Every change also bumps a generation. Readers note it before reading a
+    record and the bytes they encode are only kept if it hasn't moved, so a
+    record read just before a write can't be cached after it.
+    """
+
+    def __init__(self, key: str, max_bytes: int = 64 * 1024 * 1024):
+        self.key = key
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+
+    def reset(self, records):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def added(self, record):
+        self._invalidate(record[self.key])
+
+    def removed(self, record):
+        self._invalidate(record[self.key])
+
+    def replaced(self, old, new):
+        self._invalidate(old[self.key])
+
+    def _invalidate(self, key: str):
+        with self._lock:
+            self._generation += 1
+            data = self._entries.pop(key, None)
+            if data is not None:
+                self._bytes -= len(data)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    def _cached(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def _store(self, key: str, record: Dict[str, Any], generation: int) -> bytes:
+        data = dumps(record)
+        with self._lock:
+            self.misses += 1
+            if generation != self._generation or len(data) > self.max_bytes:
+                return data
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return data
+
+    def get(self, key: str, read: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[bytes]:
+        """The encoded record for `key`, calling read(key) only on a miss. None if there is no such record."""
+        data = self._cached(key)
+        if data is not None:
+            return data
+        generation = self._generation
+        record = read(key)
+        if record is None:
+            return None
+        return self._store(key, record, generation)
+
+    def encoded(self, record: Dict[str, Any], generation: int) -> bytes:
+        """
+        The encoded form of a record the caller already read, having noted
+        `generation` beforehand.
+        """
+        key = record[self.key]
+        data = self._cached(key)
+        if data is not None:
+            return data
+        return self._store(key, record, generation)
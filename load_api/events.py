@@ -0,0 +1,145 @@
+import asyncio, time
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from changes import ChangeLog
+from encoding import dumps
+from pagination import encode_cursor
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+def sse(event: str, data: bytes, event_id: Optional[str] = None) -> bytes:
+    """One Server-Sent Event. `data` is a single line of JSON."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + data + b"\n\n"
+
+
+class ChangeBroadcaster:
+    """
+    Wakes event streams when any change log grows.
+
+    Appends made by this process wake them straight away, through each
+    log's on_append hook. Other workers' appends only show up in the log
+    files, so while any stream is open one task per process checks the
+    logs every `interval` seconds, however many streams there are.
+
+    A stream takes a ticket() before reading the logs and then waits on it,
+    so a change landing between the read and the wait isn't missed.
+    """
+
+    def __init__(self, logs: Dict[str, ChangeLog], interval: float = 1.0):
+        self.logs = logs
+        self.interval = interval
+        self.streams = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Hook into the logs and start polling. Call from the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        for log in self.logs.values():
+            log.on_append = self.notify
+        self._task = self._loop.create_task(self._poll())
+
+    async def stop(self):
+        for log in self.logs.values():
+            log.on_append = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    def notify(self):
+        """Wake every stream. Safe to call from any thread."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def ticket(self) -> asyncio.Event:
+        return self._event
+
+    async def wait(self, ticket: asyncio.Event, timeout: float) -> bool:
+        """Wait until something changed after `ticket` was taken; False on timeout."""
+        try:
+            await asyncio.wait_for(ticket.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _poll(self):
+        seen = None
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.streams:
+                seen = None
+                continue
+            latest = {}
+            for name, log in self.logs.items():
+                latest[name] = await run_in_threadpool(log.latest)
+            # The first look after streams open has nothing to compare with,
+            # so it wakes them in case they missed a change made before it
+            if latest != seen:
+                self._wake()
+            seen = latest
+
+
+async def change_events(broadcaster: ChangeBroadcaster, positions: Dict[str, int], resumed: bool,
+                        keepalive: float = 15.0, duration: float = 300.0, batch: int = 500) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events for the change logs named in `positions`, starting
+    after the given sequence numbers:
+
+    - `ready`: sent first, with the positions the stream starts from
+    - one event per change, named after its collection, carrying the
+      change log entry as data
+    - `resync`: the collection's log no longer reaches back to the
+      position; the client should download it again
+
+    Every event's id encodes the position reached in each collection, for
+    the client to send back as Last-Event-ID. A comment line goes out after
+    `keepalive` seconds without changes, and the stream ends after
+    `duration` seconds so clients reconnect from their last id.
+    """
+    positions = dict(positions)
+
+    def event_id() -> str:
+        return encode_cursor("events", positions)
+
+    broadcaster.streams += 1
+    try:
+        yield b"retry: 2000\n\n"
+        yield sse("ready", dumps({"positions": positions, "resumed": resumed}), event_id())
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            ticket = broadcaster.ticket()
+            chunks = []
+            for name in positions:
+                log = broadcaster.logs[name]
+                entries, _, latest = await run_in_threadpool(log.since, positions[name], batch)
+                if entries is None:
+                    positions[name] = latest
+                    chunks.append(sse("resync", dumps({"collection": name, "latest": latest}), event_id()))
+                    continue
+                for entry in entries:
+                    positions[name] += 1
+                    chunks.append(sse(name, entry, event_id()))
+            if chunks:
+                yield b"".join(chunks)
+                continue
+            remaining = deadline - time.monotonic()
+            if not await broadcaster.wait(ticket, min(keepalive, max(remaining, 0))):
+                yield b": keepalive\n\n"
+    finally:
+        broadcaster.streams -= 1
@@ -0,0 +1,121 @@
+import csv, math, os, re, threading
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.csv")
+EARTH_RADIUS_MILES = 3958.8
+
+STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
+    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}
+ABBREVIATIONS = set(STATES.values())
+# Leading words written more than one way: "St. Louis", "Saint Louis"
+PREFIXES = {"saint": "st", "ft": "fort", "mt": "mount"}
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _city_key(city: str) -> str:
+    words = city.replace(".", " ").casefold().split()
+    if words and words[0] in PREFIXES:
+        words[0] = PREFIXES[words[0]]
+    return " ".join(words)
+
+
+def _state_code(state: str) -> Optional[str]:
+    """Two-letter code for "TX", "tx", "Texas" or "TX 75201"; None if it isn't a state."""
+    state = re.sub(r"[\d-]+", " ", state).strip()
+    if state.upper() in ABBREVIATIONS:
+        return state.upper()
+    return STATES.get(" ".join(state.casefold().split()))
+
+
+class Gazetteer:
+    """
+    City -> (latitude, longitude), read from a CSV of city, state, lat, lon
+    shipped with the API, so no lookup leaves the process.
+
+    Places are written the way loads name them: "Dallas, TX", "Dallas, Texas",
+    "Dallas TX" or just "Dallas". A bare city name resolves to its first row;
+    the bundled file lists cities largest first. Coordinates are city
+    centres, close enough for deadhead estimates.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._places: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._cities: Dict[str, Tuple[float, float]] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                point = (float(row["lat"]), float(row["lon"]))
+                city = _city_key(row["city"])
+                self._places[(city, row["state"].upper())] = point
+                self._cities.setdefault(city, point)
+        self._lock = threading.Lock()
+        self._resolved: Dict[str, Optional[Tuple[float, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def _parse(self, place: str) -> Optional[Tuple[float, float]]:
+        city, _, state = place.rpartition(",")
+        if city:
+            code = _state_code(state)
+            return self._places.get((_city_key(city), code)) if code else None
+        words = place.split()
+        # "Dallas TX", "Salt Lake City Utah", "Albany New York"
+        for split in (1, 2):
+            if len(words) > split:
+                code = _state_code(" ".join(words[-split:]))
+                if code:
+                    found = self._places.get((_city_key(" ".join(words[:-split])), code))
+                    if found:
+                        return found
+        return self._cities.get(_city_key(place))
+
+    def locate(self, place: Optional[str]) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of a place name, or None if it isn't in the gazetteer."""
+        if not isinstance(place, str) or not place.strip():
+            return None
+        with self._lock:
+            if place in self._resolved:
+                return self._resolved[place]
+        point = self._parse(place)
+        with self._lock:
+            if len(self._resolved) >= 65536:
+                self._resolved.clear()
+            self._resolved[place] = point
+        return point
+
+    def add_coordinates(self, load: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in origin_lat/origin_lon and destination_lat/destination_lon
+        from the gazetteer where the load doesn't already give both. A pair
+        that can't be resolved is left out rather than stored as null.
+        """
+        for end in ("origin", "destination"):
+            lat, lon = f"{end}_lat", f"{end}_lon"
+            if load.get(lat) is not None and load.get(lon) is not None:
+                continue
+            load.pop(lat, None)
+            load.pop(lon, None)
+            point = self.locate(load.get(end))
+            if point is not None:
+                load[lat], load[lon] = point
+        return load
@@ -0,0 +1,252 @@
+import heapq, math, threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from gazetteer import Gazetteer, haversine_miles
+from store import CollectionListener
+from timestamps import parse_timestamp
+
+NAN = float("nan")
+INF = float("inf")
+MILES_PER_DEGREE = 69.05
+
+
+class _Bucket:
+    """
+    Loads picking up at one place with one equipment type, best rate per
+    mile first, then by load_id. The sort key is -rate per mile, or inf
+    when the load has no rate or miles, so those come last.
+    """
+
+    __slots__ = ("keys", "ids", "pickups", "destinations")
+
+    def __init__(self, entries: List[Tuple[float, str, float, int]] = ()):
+        entries = sorted(entries)
+        self.keys = array("d", (e[0] for e in entries))
+        self.ids = [e[1] for e in entries]
+        self.pickups = array("d", (e[2] for e in entries))
+        self.destinations = array("i", (e[3] for e in entries))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _find(self, key: float, load_id: str) -> int:
+        return bisect_left(self.ids, load_id, bisect_left(self.keys, key), bisect_right(self.keys, key))
+
+    def insert(self, entry: Tuple[float, str, float, int]):
+        key, load_id, pickup, destination = entry
+        i = self._find(key, load_id)
+        self.keys.insert(i, key)
+        self.ids.insert(i, load_id)
+        self.pickups.insert(i, pickup)
+        self.destinations.insert(i, destination)
+
+    def remove(self, key: float, load_id: str):
+        i = self._find(key, load_id)
+        if i < len(self.ids) and self.ids[i] == load_id:
+            del self.keys[i], self.ids[i], self.pickups[i], self.destinations[i]
+
+    def entries(self, deadhead: float) -> Iterator[Tuple[float, float, str, float, int]]:
+        return zip(self.keys, repeat(deadhead), self.ids, self.pickups, self.destinations)
+
+
+class LoadGeoIndex(CollectionListener):
+    """
+    Loads by where they pick up, maintained by the loads store, for
+    matching a carrier's position against the board.
+
+    Each distinct origin point (from the load's origin_lat/origin_lon, or
+    the gazetteer for loads saved without them) is filed in a grid of
+    `cell_degrees` squares. Loads at a point are kept per equipment type in
+    a _Bucket sorted by rate per mile. A radius query reads only the cells
+    the circle overlaps, measures each point there once, and then walks
+    buckets in ranking order, stopping after `limit` matches. Its cost
+    depends on the number of places nearby and the page size, not on how
+    many loads are on the board.
+    """
+
+    def __init__(self, gazetteer: Gazetteer, key: str = "load_id", cell_degrees: float = 1.0):
+        self.gazetteer = gazetteer
+        self.key = key
+        self.cell_degrees = cell_degrees
+        self._lock = threading.RLock()
+        self._points: List[Tuple[float, float]] = []
+        self._point_ids: Dict[Tuple[float, float], int] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._buckets: Dict[int, Dict[str, _Bucket]] = {}
+
+    # -- maintenance (caller holds self._lock) -----------------------------
+
+    def _point(self, record, end: str) -> Optional[int]:
+        """Id of the record's origin or destination point, registering it if new."""
+        lat, lon = record.get(f"{end}_lat"), record.get(f"{end}_lon")
+        if isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and not (math.isnan(lat) or math.isnan(lon)):
+            point = (float(lat), float(lon))
+        else:
+            point = self.gazetteer.locate(record.get(end))
+            if point is None:
+                return None
+        point_id = self._point_ids.get(point)
+        if point_id is None:
+            point_id = self._point_ids[point] = len(self._points)
+            self._points.append(point)
+            self._cells.setdefault(self._cell(*point), []).append(point_id)
+        return point_id
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    @staticmethod
+    def rate_per_mile(record) -> Optional[float]:
+        rate, miles = record.get("loadboard_rate"), record.get("miles")
+        if isinstance(rate, (int, float)) and isinstance(miles, (int, float)) and miles > 0:
+            return rate / miles
+        return None
+
+    @staticmethod
+    def _equipment(record) -> str:
+        value = record.get("equipment_type")
+        return value.casefold() if isinstance(value, str) else ""
+
+    def _entry(self, record) -> Optional[Tuple[int, str, Tuple[float, str, float, int]]]:
+        """(origin point, equipment, bucket entry), or None if the origin can't be placed."""
+        origin = self._point(record, "origin")
+        if origin is None:
+            return None
+        rpm = self.rate_per_mile(record)
+        pickup = record.get("pickup_datetime")
+        try:
+            pickup = parse_timestamp(pickup) if isinstance(pickup, str) else None
+        except ValueError:
+            pickup = None
+        destination = self._point(record, "destination")
+        entry = (-rpm if rpm is not None else INF, record[self.key],
+                 NAN if pickup is None else pickup, -1 if destination is None else destination)
+        return origin, self._equipment(record), entry
+
+    def _add(self, record):
+        found = self._entry(record)
+        if found is None:
+            return
+        origin, equipment, entry = found
+        buckets = self._buckets.setdefault(origin, {})
+        bucket = buckets.get(equipment)
+        if bucket is None:
+            bucket = buckets[equipment] = _Bucket()
+        bucket.insert(entry)
+
+    def _remove(self, record):
+        found = self._entry(record)
+        if found is None:
+            return
+        origin, equipment, entry = found
+        buckets = self._buckets.get(origin, {})
+        bucket = buckets.get(equipment)
+        if bucket is not None:
+            bucket.remove(entry[0], entry[1])
+            if not bucket:
+                del buckets[equipment]
+
+    # -- CollectionListener ------------------------------------------------
+
+    def reset(self, records):
+        with self._lock:
+            self._points, self._point_ids, self._cells, self._buckets = [], {}, {}, {}
+            grouped: Dict[Tuple[int, str], list] = {}
+            for record in records:
+                found = self._entry(record)
+                if found is not None:
+                    origin, equipment, entry = found
+                    grouped.setdefault((origin, equipment), []).append(entry)
+            for (origin, equipment), entries in grouped.items():
+                self._buckets.setdefault(origin, {})[equipment] = _Bucket(entries)
+
+    def added(self, record):
+        with self._lock:
+            self._add(record)
+
+    def removed(self, record):
+        with self._lock:
+            self._remove(record)
+
+    def replaced(self, old, new):
+        with self._lock:
+            self._remove(old)
+            self._add(new)
+
+    # -- querying ----------------------------------------------------------
+
+    def _within(self, lat: float, lon: float, radius: float) -> List[Tuple[float, int]]:
+        """(distance, point id) for every point within `radius` miles, nearest first. Caller holds self._lock."""
+        dlat = radius / MILES_PER_DEGREE
+        dlon = radius / (MILES_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 0.01))
+        (lat0, lon0), (lat1, lon1) = self._cell(lat - dlat, lon - dlon), self._cell(lat + dlat, lon + dlon)
+        found = []
+        for i in range(lat0, lat1 + 1):
+            for j in range(lon0, lon1 + 1):
+                for point_id in self._cells.get((i, j), ()):
+                    distance = haversine_miles(lat, lon, *self._points[point_id])
+                    if distance <= radius:
+                        found.append((distance, point_id))
+        found.sort()
+        return found
+
+    def match(self, lat: float, lon: float, radius_miles: float, equipment_type: Optional[str] = None,
+              pickup_from: Optional[float] = None, pickup_to: Optional[float] = None,
+              destination: Optional[Tuple[float, float, float]] = None, sort: str = "deadhead",
+              limit: int = 10) -> List[Tuple[str, float, Optional[float]]]:
+        """
+        Up to `limit` loads picking up within `radius_miles` of (lat, lon),
+        as (load_id, deadhead miles, rate per mile or None).
+
+        - equipment_type: exact, case-insensitive
+        - pickup_from / pickup_to: epoch seconds; loads without a pickup
+          time are left out when either is given
+        - destination: (lat, lon, radius miles) the load must deliver within
+        - sort: "deadhead" ranks by distance to pickup, then rate per mile;
+          "rate_per_mile" ranks by rate per mile, then distance
+        """
+        equipment = equipment_type.casefold() if equipment_type is not None else None
+        with self._lock:
+            near = self._within(lat, lon, radius_miles)
+            allowed: Optional[Set[int]] = None
+            if destination is not None:
+                allowed = {point_id for _, point_id in self._within(*destination)}
+                if not allowed:
+                    return []
+
+            def streams(deadhead, point_id):
+                buckets = self._buckets.get(point_id, {})
+                if equipment is not None:
+                    bucket = buckets.get(equipment)
+                    return [bucket.entries(deadhead)] if bucket else []
+                return [bucket.entries(deadhead) for bucket in buckets.values()]
+
+            if sort == "deadhead":
+                # Points nearest first; at each, its buckets merged by rate per mile
+                ranked = (entry for deadhead, point_id in near
+                          for entry in heapq.merge(*streams(deadhead, point_id)))
+            else:
+                merged = [s for deadhead, point_id in near for s in streams(deadhead, point_id)]
+                ranked = heapq.merge(*merged)
+            matches = []
+            for key, deadhead, load_id, pickup, destination_id in ranked:
+                if pickup_from is not None and not pickup >= pickup_from:
+                    continue
+                if pickup_to is not None and not pickup <= pickup_to:
+                    continue
+                if allowed is not None and destination_id not in allowed:
+                    continue
+                matches.append((load_id, deadhead, -key if key != INF else None))
+                if len(matches) >= limit:
+                    break
+            return matches
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "points": len(self._points),
+                "loads": sum(len(b) for buckets in self._buckets.values() for b in buckets.values()),
+            }
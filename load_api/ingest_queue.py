@@ -0,0 +1,124 @@
+import queue, threading, time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class IngestQueue:
+    """
+    A bounded in-process queue drained by a pool of worker threads.
+
+    submit() never blocks: it returns False when the queue is full so the
+    caller can push back. Each worker takes whatever is waiting, up to
+    `max_batch` items, and hands it to `handler` in one call, so a backlog
+    drains in a few large writes rather than many small ones. stop() refuses
+    new work, waits for everything queued to be handled and then joins the
+    workers.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Any], maxsize: int = 10000,
+                 workers: int = 2, max_batch: int = 500):
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._threads: List[threading.Thread] = []
+        self._accepting = False
+        self._stats_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self.last_lag = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self._accepting = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item: Any) -> bool:
+        """Queue `item` for the workers. Returns False if the queue is full or stopped."""
+        if not self._accepting:
+            return False
+        try:
+            self._queue.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            return False
+        with self._stats_lock:
+            self.accepted += 1
+        return True
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch = [first]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            try:
+                self.handler([item for _, item in batch])
+                with self._stats_lock:
+                    self.processed += len(batch)
+                    self.last_lag = time.monotonic() - batch[0][0]
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += len(batch)
+                    self.last_error = f"{type(e).__name__}: {e}"
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def lag(self) -> float:
+        """Seconds the oldest queued item has been waiting."""
+        with self._queue.mutex:
+            # Skip the None sentinels stop() queues for the workers
+            oldest = next((item for item in self._queue.queue if item is not None), None)
+        if oldest is None:
+            return 0.0
+        return time.monotonic() - oldest[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "running": self._accepting,
+                "queue_depth": self._queue.qsize(),
+                "capacity": self.maxsize,
+                "workers": self.workers,
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "failed": self.failed,
+                "lag_seconds": round(self.lag(), 3),
+                "last_batch_lag_seconds": round(self.last_lag, 3),
+                "last_error": self.last_error,
+            }
+
+    def stop(self):
+        """Stop accepting work, drain the queue and join the workers."""
+        self._accepting = False
+        if not self._threads:
+            return
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
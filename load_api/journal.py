@@ -0,0 +1,176 @@
+import json, os, threading
+from typing import List, Optional
+
+from store import Collection, JsonFileStorage, apply_op
+
+
+class JournalStorage(JsonFileStorage):
+    """
+    A JSON snapshot file plus an append-only log of changes since it.
+
+    The JSON array at `path` is the snapshot; an existing file is used as-is.
+    Every put or delete appends one JSON line to `log_path`, so a write costs
+    O(record) rather than O(collection). Loading reads the snapshot and
+    replays the log over it; when only the log has grown since the last read,
+    just the new tail is handed back as ops.
+
+    Appends are flushed to the OS under the collection lock and fsynced after
+    it is released. Concurrent writers share fsyncs: whichever reaches the
+    sync first covers every line written before it (group commit).
+
+    Other processes may append to the same log under the shared write lock;
+    each picks up the others' lines by replaying the tail past its offset.
+
+    compact() folds the log back into the snapshot; run a Compactor to do so
+    whenever the log grows past `compact_bytes`.
+    """
+
+    def __init__(self, path: str, key: str, log_path: Optional[str] = None,
+                 compact_bytes: int = 8 * 1024 * 1024, missing_ok: bool = True):
+        super().__init__(path, missing_ok=missing_ok)
+        self.key = key
+        self.log_path = log_path or path + ".log"
+        self.compact_bytes = compact_bytes
+        self._log = None
+        self._log_offset = 0
+        self._written = 0
+        self._synced = 0
+        self._sync_lock = threading.Lock()
+
+    # -- reading ---------------------------------------------------------
+
+    def signature(self):
+        try:
+            st = os.stat(self.log_path)
+            log = (st.st_size, st.st_ino)
+        except FileNotFoundError:
+            log = None
+        return (super().signature(), log)
+
+    def _read_log(self, offset: int) -> List[tuple]:
+        """Ops from complete log lines past `offset`; advances the read offset."""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            self._log_offset = 0
+            return []
+        end = data.rfind(b"\n") + 1
+        ops = []
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn line can only come from a crash mid-append; skip it
+                continue
+            if entry.get("op") == "put":
+                ops.append(("put", entry["record"]))
+            elif entry.get("op") == "delete":
+                ops.append(("delete", entry["key"]))
+        self._log_offset = offset + end
+        return ops
+
+    def load(self):
+        by_key = {r[self.key]: r for r in super().load()}
+        for op in self._read_log(0):
+            apply_op(by_key, self.key, op)
+        return list(by_key.values())
+
+    def load_changes(self, signature):
+        current = self.signature()
+        if (signature is None or signature[0] != current[0] or signature[1] is None
+                or current[1] is None or current[1][1] != signature[1][1]
+                or current[1][0] < self._log_offset):
+            # The snapshot was replaced or the log truncated: start over
+            return None
+        return self._read_log(self._log_offset)
+
+    # -- writing ---------------------------------------------------------
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.log_path, "ab")
+        # Writes refresh first, which consumes every complete line, so
+        # anything past the read offset is a line torn by a crash mid-append.
+        # Drop it so the next append starts on a fresh line.
+        if os.fstat(self._log.fileno()).st_size > self._log_offset:
+            self._log.truncate(self._log_offset)
+        return self._log
+
+    def write(self, records, ops):
+        lines = []
+        for op in ops:
+            if op[0] == "put":
+                entry = {"op": "put", "record": op[1]}
+            else:
+                entry = {"op": "delete", "key": op[1]}
+            lines.append(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+        log = self._open_log()
+        log.write(b"".join(lines))
+        log.flush()
+        self._log_offset = log.tell()
+        self._written += 1
+        return self._written
+
+    def sync(self, token):
+        if token is None or self._synced >= token:
+            return
+        with self._sync_lock:
+            if self._synced >= token:
+                return
+            target = self._written
+            os.fsync(self._log.fileno())
+            self._synced = target
+
+    # -- compaction ------------------------------------------------------
+
+    def needs_compaction(self):
+        try:
+            return os.path.getsize(self.log_path) >= self.compact_bytes
+        except FileNotFoundError:
+            return False
+
+    def compact(self, records):
+        with self._sync_lock:
+            self._replace(records)
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            open(self.log_path, "wb").close()
+            self._log_offset = 0
+            self._synced = self._written
+
+    def close(self):
+        self.sync(self._written)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        super().close()
+
+
+class Compactor:
+    """Background thread that compacts a collection whose storage asks for it."""
+
+    def __init__(self, collection: Collection, interval: float = 5.0):
+        self.collection = collection
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.collection.storage.needs_compaction():
+                self.collection.compact()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,972 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from itertools import chain, compress, islice, repeat
+from operator import eq, lt, ne
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from timestamps import parse_timestamp
+
+NAN = float("nan")
+INF = float("inf")
+
+
+def _widened(codes: array, code: int) -> array:
+    """`codes`, moved to a wider typecode if it can't hold `code`."""
+    while code >= 1 << (8 * codes.itemsize):
+        codes = array({"B": "H", "H": "I"}[codes.typecode], codes)
+    return codes
+
+
+class NumberColumn:
+    """A numeric field as a float64 array; NaN where the row has no number."""
+
+    def __init__(self):
+        self.values = array("d")
+
+    def encode(self, value) -> float:
+        if not isinstance(value, (int, float)):
+            return NAN
+        try:
+            return float(value)
+        except OverflowError:
+            return INF if value > 0 else -INF
+
+    def append(self, value):
+        self.values.append(self.encode(value))
+
+    def extend(self, values: List[Any]):
+        try:
+            # All numbers, the usual case: converted in one C call
+            block = array("d", values)
+        except (TypeError, OverflowError):
+            block = array("d", map(self.encode, values))
+        self.values.extend(block)
+
+    def set(self, row: int, value):
+        self.values[row] = self.encode(value)
+
+    def clear(self, row: int):
+        self.values[row] = NAN
+
+    def mask_range(self, lo: Optional[float], hi: Optional[float], start: int, end: int) -> bytes:
+        """One byte per row in [start, end): 1 where lo <= value <= hi. NaN never matches."""
+        block = self.values[start:end]
+        if hi is None:
+            return bytes(map(lo.__le__, block))
+        if lo is None:
+            return bytes(map(hi.__ge__, block))
+        both = int.from_bytes(bytes(map(lo.__le__, block)), "little") & int.from_bytes(bytes(map(hi.__ge__, block)), "little")
+        return both.to_bytes(end - start, "little")
+
+    def take(self, rows: List[int]) -> "NumberColumn":
+        column = type(self)()
+        column.values = array("d", map(self.values.__getitem__, rows))
+        return column
+
+
+class TimeColumn(NumberColumn):
+    """
+    An ISO-8601 field as epoch seconds in a float64 array, parsed with
+    parse_timestamp(); NaN where the row holds no parseable time.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Pickup times repeat a lot, so parsing is memoized
+        self._parsed: Dict[str, float] = {}
+
+    def encode(self, value) -> float:
+        if not isinstance(value, str):
+            return NAN
+        epoch = self._parsed.get(value)
+        if epoch is None:
+            try:
+                parsed = parse_timestamp(value)
+            except ValueError:
+                parsed = None
+            epoch = NAN if parsed is None else parsed
+            if len(self._parsed) >= 65536:
+                self._parsed.clear()
+            self._parsed[value] = epoch
+        return epoch
+
+    def extend(self, values: List[Any]):
+        # Each distinct time is parsed once, then every row is looked up in one pass
+        try:
+            distinct = dict.fromkeys(values)
+        except TypeError:
+            self.values.extend(array("d", map(self.encode, values)))
+            return
+        self._parsed.clear()
+        for value in distinct:
+            self._parsed[value] = self.encode(value) if isinstance(value, str) else NAN
+        self.values.extend(array("d", map(self._parsed.__getitem__, values)))
+
+
+class CodeColumn:
+    """
+    A dictionary-encoded field: each distinct value is stored once in
+    `values`, and rows hold its index in a typed array that widens from one
+    byte as the dictionary grows. Code 0 means no value, or one that can't
+    be hashed.
+
+    An equality or substring filter is decided once per distinct value,
+    then applied to the codes with a single bytes.translate() while there
+    are fewer than 256 of them.
+    """
+
+    def __init__(self):
+        self.codes = array("B")
+        self.values: List[Any] = [None]
+        self._lookup: Dict[tuple, int] = {}
+
+    def encode(self, value) -> int:
+        # Keyed with the type so that 1, 1.0 and True stay distinct
+        try:
+            code = self._lookup.get((type(value), value))
+        except TypeError:
+            return 0
+        if code is None:
+            code = self._lookup[(type(value), value)] = len(self.values)
+            self.values.append(value)
+            self.codes = _widened(self.codes, code)
+        return code
+
+    def append(self, value):
+        code = self.encode(value)
+        self.codes.append(code)
+
+    def extend(self, values: List[Any]):
+        # Values of one type, the usual case: each distinct value is encoded
+        # once, then every row is looked up in one pass
+        codes = None
+        if len(set(map(type, values))) == 1:
+            try:
+                distinct = {value: self.encode(value) for value in dict.fromkeys(values)}
+                codes = list(map(distinct.__getitem__, values))
+            except TypeError:
+                pass
+        if codes is None:
+            codes = list(map(self.encode, values))
+        # encode() has widened the codes to fit every one of them
+        self.codes.extend(array(self.codes.typecode, codes))
+
+    def set(self, row: int, value):
+        code = self.encode(value)
+        self.codes[row] = code
+
+    def clear(self, row: int):
+        self.codes[row] = 0
+
+    def mask_in(self, codes: set, start: int, end: int) -> bytes:
+        """One byte per row in [start, end): 1 where the row's code is in `codes`."""
+        if self.codes.typecode == "B":
+            table = bytes(code in codes for code in range(256))
+            return self.codes[start:end].tobytes().translate(table)
+        return bytes(map(codes.__contains__, self.codes[start:end]))
+
+    def take(self, rows: List[int]) -> "CodeColumn":
+        column = CodeColumn()
+        column.codes = array(self.codes.typecode, map(self.codes.__getitem__, rows))
+        column.values = self.values
+        column._lookup = self._lookup
+        return column
+
+
+class SortedIndex:
+    """
+    The rows of a NumberColumn ordered by value, as parallel arrays of
+    values and rows sorted by (value, row), so a range of values is two
+    bisections away. Rows without a number (NaN) are left out.
+    """
+
+    def __init__(self):
+        self.keys = array("d")
+        self.rows = array("I")
+
+    @classmethod
+    def build(cls, column: NumberColumn) -> "SortedIndex":
+        values = column.values
+        index = cls()
+        # sorted() is stable, so rows with equal values stay in row order
+        index.rows = array("I", sorted(compress(range(len(values)), map(eq, values, values)), key=values.__getitem__))
+        index.keys = array("d", map(values.__getitem__, index.rows))
+        return index
+
+    def _find(self, value: float, row: int) -> int:
+        lo = bisect_left(self.keys, value)
+        return bisect_left(self.rows, row, lo, bisect_right(self.keys, value, lo))
+
+    def add(self, column: NumberColumn, row: int):
+        value = column.values[row]
+        if value == value:
+            i = self._find(value, row)
+            self.keys.insert(i, value)
+            self.rows.insert(i, row)
+
+    def remove(self, column: NumberColumn, row: int):
+        value = column.values[row]
+        if value == value:
+            i = self._find(value, row)
+            del self.keys[i]
+            del self.rows[i]
+
+    def span(self, lo: Optional[float], hi: Optional[float]) -> Tuple[int, int]:
+        """The slice of `rows` whose values lie in [lo, hi]."""
+        start = 0 if lo is None else bisect_left(self.keys, lo)
+        end = len(self.keys) if hi is None else bisect_right(self.keys, hi)
+        return start, max(start, end)
+
+
+class PostingIndex:
+    """The rows holding each code of a CodeColumn, as sorted arrays keyed by code."""
+
+    def __init__(self):
+        self.postings: Dict[int, array] = {}
+
+    @classmethod
+    def build(cls, column: CodeColumn) -> "PostingIndex":
+        codes = column.codes
+        index = cls()
+        # Rows sorted by code, stably, then cut into one run per code
+        order = sorted(range(len(codes)), key=codes.__getitem__)
+        start = 0
+        for code, count in sorted(Counter(codes).items()):
+            if code:
+                index.postings[code] = array("I", order[start:start + count])
+            start += count
+        return index
+
+    def add(self, column: CodeColumn, row: int):
+        code = column.codes[row]
+        if code:
+            insort(self.postings.setdefault(code, array("I")), row)
+
+    def remove(self, column: CodeColumn, row: int):
+        code = column.codes[row]
+        if code:
+            rows = self.postings[code]
+            del rows[bisect_left(rows, row)]
+            if not rows:
+                del self.postings[code]
+
+    def count(self, codes: set) -> int:
+        return sum(len(self.postings.get(code, ())) for code in codes)
+
+    def rows(self, codes: set) -> List[int]:
+        """Every row holding one of `codes`, in row order."""
+        runs = [self.postings[code] for code in codes if code in self.postings]
+        if len(runs) == 1:
+            return list(runs[0])
+        return sorted(chain.from_iterable(runs))
+
+
+def _trigrams(value) -> set:
+    """Every three-character run of `value`, lowercased; empty if it isn't a string."""
+    if not isinstance(value, str):
+        return set()
+    folded = value.lower()
+    return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+
+class TrigramIndex(PostingIndex):
+    """
+    A PostingIndex over a string field that also maps each trigram of the
+    values held, lowercased, to the codes containing it. A substring of
+    three or more characters can only be in values holding all of its
+    trigrams, so only those values need to be tested.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.trigrams: Dict[str, set] = {}
+
+    @classmethod
+    def build(cls, column: CodeColumn) -> "TrigramIndex":
+        index = super().build(column)
+        for code in index.postings:
+            index._index_code(column, code)
+        return index
+
+    def _index_code(self, column: CodeColumn, code: int):
+        for trigram in _trigrams(column.values[code]):
+            self.trigrams.setdefault(trigram, set()).add(code)
+
+    def _unindex_code(self, column: CodeColumn, code: int):
+        for trigram in _trigrams(column.values[code]):
+            codes = self.trigrams[trigram]
+            codes.discard(code)
+            if not codes:
+                del self.trigrams[trigram]
+
+    def add(self, column: CodeColumn, row: int):
+        code = column.codes[row]
+        first = code and code not in self.postings
+        super().add(column, row)
+        if first:
+            self._index_code(column, code)
+
+    def remove(self, column: CodeColumn, row: int):
+        code = column.codes[row]
+        super().remove(column, row)
+        if code and code not in self.postings:
+            self._unindex_code(column, code)
+
+    def containing(self, column: CodeColumn, query: str) -> Optional[set]:
+        """
+        Codes of held values containing the lowercase `query`, or None if
+        it is too short to have a trigram.
+        """
+        wanted = _trigrams(query)
+        if not wanted:
+            return None
+        runs = sorted((self.trigrams.get(trigram, set()) for trigram in wanted), key=len)
+        codes = runs[0].intersection(*runs[1:])
+        values = column.values
+        return {code for code in codes if query in values[code].lower()}
+
+
+class ValueFilter:
+    """
+    Rows of a CodeColumn whose value passes `test`. The matching codes are
+    worked out incrementally as the column's dictionary grows.
+    """
+
+    def __init__(self, name: str, test: Callable[[Any], bool]):
+        self.name = name
+        self.test = test
+        self._values = None
+        self._checked = 1
+        self._codes = set()
+
+    def codes(self, table: "LoadTable") -> set:
+        column = table._columns[self.name]
+        if column.values is not self._values:
+            self._values, self._checked, self._codes = column.values, 1, set()
+        values = column.values
+        for code in range(self._checked, len(values)):
+            if self.test(values[code]):
+                self._codes.add(code)
+        self._checked = len(values)
+        return self._codes
+
+    def mask(self, table: "LoadTable", start: int, end: int) -> bytes:
+        return table._columns[self.name].mask_in(self.codes(table), start, end)
+
+    def count(self, table: "LoadTable") -> Optional[int]:
+        """How many rows rows() would return, or None if the field isn't indexed."""
+        index = table._indexes.get(self.name)
+        if index is None:
+            return None
+        return index.count(self.codes(table))
+
+    def rows(self, table: "LoadTable") -> List[int]:
+        return table._indexes[self.name].rows(self.codes(table))
+
+    def select(self, table: "LoadTable", rows: List[int]) -> List[int]:
+        """The rows of `rows` that pass."""
+        codes = self.codes(table)
+        column = table._columns[self.name]
+        return list(compress(rows, map(codes.__contains__, map(column.codes.__getitem__, rows))))
+
+
+class SubstringFilter(ValueFilter):
+    """
+    Rows of a CodeColumn whose value contains `query`, case-insensitively.
+    With a TrigramIndex on the field, only the values holding every trigram
+    of the query are tested, rather than every value the column has seen.
+    """
+
+    def __init__(self, name: str, query: str):
+        self.query = query.lower()
+        super().__init__(name, _contains_folded(self.query))
+        self._version = None
+
+    def codes(self, table: "LoadTable") -> set:
+        index = table._indexes.get(self.name)
+        if not isinstance(index, TrigramIndex):
+            return super().codes(table)
+        if table._version != self._version:
+            codes = index.containing(table._columns[self.name], self.query)
+            if codes is None:
+                return super().codes(table)
+            self._version, self._codes = table._version, codes
+        return self._codes
+
+
+class RangeFilter:
+    """Rows of a NumberColumn whose value lies in [lo, hi]; either bound may be None."""
+
+    def __init__(self, name: str, lo: Optional[float], hi: Optional[float]):
+        self.name = name
+        self.lo = None if lo is None else float(lo)
+        self.hi = None if hi is None else float(hi)
+
+    def mask(self, table: "LoadTable", start: int, end: int) -> bytes:
+        return table._columns[self.name].mask_range(self.lo, self.hi, start, end)
+
+    def count(self, table: "LoadTable") -> Optional[int]:
+        """How many rows rows() would return, or None if the field isn't indexed."""
+        index = table._indexes.get(self.name)
+        if index is None:
+            return None
+        start, end = index.span(self.lo, self.hi)
+        return end - start
+
+    def rows(self, table: "LoadTable") -> List[int]:
+        index = table._indexes[self.name]
+        start, end = index.span(self.lo, self.hi)
+        return sorted(index.rows[start:end])
+
+    def select(self, table: "LoadTable", rows: List[int]) -> List[int]:
+        """The rows of `rows` that pass."""
+        values = table._columns[self.name].values
+        if self.lo is not None:
+            rows = list(compress(rows, map(self.lo.__le__, map(values.__getitem__, rows))))
+        if self.hi is not None:
+            rows = list(compress(rows, map(self.hi.__ge__, map(values.__getitem__, rows))))
+        return rows
+
+
+def _equals_folded(query: str) -> Callable[[Any], bool]:
+    return lambda value: isinstance(value, str) and value.lower() == query
+
+
+def _contains_folded(query: str) -> Callable[[Any], bool]:
+    return lambda value: isinstance(value, str) and query in value.lower()
+
+
+class LoadTable(MutableMapping):
+    """
+    The load board held compactly, as a MutableMapping of load_id -> load.
+
+    Each load is kept as a tuple of its values, in the order of a field
+    layout shared by every load with the same keys, so a load costs one
+    tuple rather than a dict. Repeated values (cities, equipment types,
+    rates, pickup times) are stored once and shared by every load that
+    holds them. A load is turned back into a dict only when it is read.
+
+    Beside the tuples, the fields GET /loads filters on and the other
+    numeric and categorical fields are kept column by column:
+
+    - loadboard_rate, weight, miles: float64 arrays
+    - pickup_datetime, delivery_datetime: epoch seconds in float64 arrays
+    - equipment_type, commodity_type, origin, destination:
+      dictionary-encoded (CodeColumn)
+
+    loadboard_rate and pickup_datetime are also kept sorted (SortedIndex),
+    equipment_type as the rows holding each value (PostingIndex), and
+    origin and destination likewise, with the trigrams of their values
+    (TrigramIndex) to find the ones containing a substring. A
+    search asks each filter with an index how many rows it matches, and if
+    the fewest is under 1/CANDIDATE_SHARE of the board, takes that filter's
+    rows as the candidates and checks only them against the other filters.
+
+    Otherwise it evaluates each filter over a block of rows as a byte mask,
+    ANDs the masks as big integers and picks out the hits with
+    itertools.compress(), so the per-row work runs in C. Blocks start small
+    and double up to `block_rows`, so a page that fills early only masks a
+    few rows. A filter that matches much of the board fills pages sooner
+    this way than by sorting its candidates.
+
+    Deleted rows are left as holes and squeezed out once they outnumber the
+    live ones. Every row keeps the position it was given on insert. Search
+    cursors name the last load_id of a page rather than a position, since
+    positions are this process's own; the load's current position is looked
+    up on each request. The positions of the last TOMBSTONES loads deleted
+    are remembered, so a page can still follow one of them.
+    """
+
+    NUMBER_FIELDS = ("loadboard_rate", "weight", "miles")
+    TIME_FIELDS = ("pickup_datetime", "delivery_datetime")
+    CODE_FIELDS = ("equipment_type", "commodity_type", "origin", "destination")
+    SORTED_FIELDS = ("loadboard_rate", "pickup_datetime")
+    POSTED_FIELDS = ("equipment_type",)
+    TRIGRAM_FIELDS = ("origin", "destination")
+    # A filter's index is used when it matches under 1/CANDIDATE_SHARE of the rows
+    CANDIDATE_SHARE = 8
+    # Past this many rows written at once, the indexes are rebuilt afterwards
+    # rather than kept current a row at a time
+    REINDEX_ROWS = 1024
+    TOMBSTONES = 65536
+    # Past this many distinct values a field is taken to be mostly unique,
+    # such as free-text notes, and its values are no longer shared
+    SHARED_VALUES = 65536
+    # Rows added by a bulk load at a time, which bounds its scratch space
+    CHUNK_ROWS = 65536
+
+    def __init__(self, key: str = "load_id", block_rows: int = 65536, first_block_rows: int = 256):
+        self.key = key
+        self.block_rows = block_rows
+        self.first_block_rows = first_block_rows
+        self._lock = threading.RLock()
+        self._seq = 0
+        # Bumped by every change, so a search can tell if its mask went stale
+        self._version = 0
+        # Nesting depth of _bulk(); indexes are left empty while it's above 0
+        self._suspended = 0
+        self._clear()
+
+    def _clear(self):
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._data: List[Optional[tuple]] = []
+        self._positions = array("q")
+        self._tombstones: "OrderedDict[str, int]" = OrderedDict()
+        self._live = bytearray()
+        self._layouts = CodeColumn()
+        self._shared: Dict[tuple, Optional[dict]] = {}
+        self._columns: Dict[str, Any] = {}
+        for name in self.NUMBER_FIELDS:
+            self._columns[name] = NumberColumn()
+        for name in self.TIME_FIELDS:
+            self._columns[name] = TimeColumn()
+        for name in self.CODE_FIELDS:
+            self._columns[name] = CodeColumn()
+        self._reindex()
+
+    def _reindex(self):
+        # Caller holds self._lock
+        self._indexes: Dict[str, Any] = {}
+        if self._suspended:
+            return
+        for name in self.SORTED_FIELDS:
+            self._indexes[name] = SortedIndex.build(self._columns[name])
+        for name in self.POSTED_FIELDS:
+            self._indexes[name] = PostingIndex.build(self._columns[name])
+        for name in self.TRIGRAM_FIELDS:
+            self._indexes[name] = TrigramIndex.build(self._columns[name])
+
+    @contextmanager
+    def _bulk(self, count: int):
+        # Caller holds self._lock. Writes of more than REINDEX_ROWS rows
+        # leave the indexes alone and rebuild them once at the end.
+        if count <= self.REINDEX_ROWS or self._suspended:
+            yield
+            return
+        self._suspended += 1
+        self._indexes = {}
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+            self._reindex()
+
+    # -- mapping -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __contains__(self, key) -> bool:
+        return key in self._rows
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._record(self._rows[key])
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._rows.get(key)
+            return default if row is None else self._record(row)
+
+    def values(self) -> Iterator[Dict[str, Any]]:
+        """Every load, in order. Not safe against concurrent writes; store.Collection holds its lock."""
+        live = compress(range(len(self._data)), self._live)
+        if len(self._layouts.values) == 2:
+            # One layout, the usual case: every dict is built in C
+            names = self._layouts.values[1]
+            return map(dict, map(zip, repeat(names), map(self._data.__getitem__, live)))
+        return map(self._record, live)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return zip(compress(self._ids, self._live), self.values())
+
+    def __setitem__(self, key: str, record: Dict[str, Any]):
+        with self._lock:
+            self._version += 1
+            row = self._rows.get(key)
+            if row is None:
+                self._append(key, record)
+            else:
+                # The row keeps its position, as a dict keeps a replaced key's
+                self._data[row] = self._pack(record)
+                self._layouts.set(row, tuple(record))
+                for name, index in self._indexes.items():
+                    index.remove(self._columns[name], row)
+                for name, column in self._columns.items():
+                    column.set(row, record.get(name))
+                for name, index in self._indexes.items():
+                    index.add(self._columns[name], row)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            row = self._rows.pop(key)
+            self._version += 1
+            self._tombstones[key] = self._positions[row]
+            if len(self._tombstones) > self.TOMBSTONES:
+                self._tombstones.popitem(last=False)
+            self._live[row] = 0
+            self._ids[row] = None
+            self._data[row] = None
+            self._layouts.clear(row)
+            for name, index in self._indexes.items():
+                index.remove(self._columns[name], row)
+            for column in self._columns.values():
+                column.clear(row)
+            dead = len(self._ids) - len(self._rows)
+            if dead > 4096 and dead > len(self._rows):
+                self._compact()
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._clear()
+
+    def update(self, other=(), **kwargs):
+        # A bulk load takes the lock once and adds new loads a chunk at a time
+        pairs = other.items() if isinstance(other, Mapping) else other
+        pairs = list(chain(pairs, kwargs.items()))
+        with self._lock, self._bulk(len(pairs)):
+            self._version += 1
+            fresh = {}
+            for key, record in pairs:
+                if key in self._rows:
+                    self[key] = record
+                else:
+                    fresh[key] = record
+            keys, records = list(fresh), list(fresh.values())
+            for start in range(0, len(keys), self.CHUNK_ROWS):
+                self._extend(keys[start:start + self.CHUNK_ROWS], records[start:start + self.CHUNK_ROWS])
+
+    def reload(self, records: List[Dict[str, Any]]):
+        """
+        Make the table hold exactly `records`, in their order, as a fresh
+        load of them would. Where the loads already held still come in the
+        same order, with new ones after them, as after writes made by
+        another process, only the differences are applied, so unchanged
+        loads keep their rows and positions. Otherwise the table is rebuilt.
+        """
+        with self._lock:
+            keys = [record[self.key] for record in records]
+            rows = list(map(self._rows.get, keys))
+            try:
+                kept = rows.index(None)
+            except ValueError:
+                kept = len(rows)
+            in_place = (
+                rows.count(None) == len(rows) - kept
+                and all(map(lt, islice(rows, max(kept - 1, 0)), islice(rows, 1, kept)))
+            )
+            if not in_place:
+                self.clear()
+                self.update(zip(keys, records))
+                return
+            # Compared by values and by layout, a row at a time in C
+            held = map(self._data.__getitem__, islice(rows, kept))
+            changed = set(compress(range(kept), map(ne, held, map(tuple, map(dict.values, records)))))
+            layouts = map(self._layouts.values.__getitem__, map(self._layouts.codes.__getitem__, islice(rows, kept)))
+            changed.update(compress(range(kept), map(ne, layouts, map(tuple, records))))
+            gone = set(self._rows).difference(islice(keys, kept)) if kept < len(self._rows) else ()
+            with self._bulk(len(changed) + len(gone) + len(keys) - kept):
+                for i in sorted(changed):
+                    self[keys[i]] = records[i]
+                for key in gone:
+                    del self[key]
+                self.update(zip(islice(keys, kept, None), islice(records, kept, None)))
+
+    # -- rows ----------------------------------------------------------------
+
+    def _sharing(self, name: str, kind: type) -> Optional[dict]:
+        # Caller holds self._lock. The values of `kind` held for field
+        # `name`, or None if they aren't shared. Kept per type so that 1,
+        # 1.0 and True stay distinct.
+        try:
+            return self._shared[(name, kind)]
+        except KeyError:
+            shared = {} if kind in (str, int, float) and name != self.key else None
+            self._shared[(name, kind)] = shared
+            return shared
+
+    def _share(self, name: str, value):
+        # Caller holds self._lock. An equal value already held, if there is
+        # one, so that repeats are stored once.
+        shared = self._sharing(name, type(value))
+        if shared is None:
+            return value
+        value = shared.setdefault(value, value)
+        if len(shared) > self.SHARED_VALUES:
+            self._shared[(name, type(value))] = None
+        return value
+
+    def _pack(self, record: Dict[str, Any]) -> tuple:
+        # Caller holds self._lock
+        return tuple(self._share(name, value) for name, value in record.items())
+
+    def _append(self, key: str, record: Dict[str, Any]):
+        # Caller holds self._lock
+        row = self._rows[key] = len(self._ids)
+        self._ids.append(key)
+        self._data.append(self._pack(record))
+        self._positions.append(self._seq)
+        self._seq += 1
+        self._tombstones.pop(key, None)
+        self._live.append(1)
+        self._layouts.append(tuple(record))
+        for name, column in self._columns.items():
+            column.append(record.get(name))
+        for name, index in self._indexes.items():
+            index.add(self._columns[name], row)
+        return row
+
+    def _extend(self, keys: List[str], records: List[Dict[str, Any]]):
+        # Caller holds self._lock. Loads that share one layout, the usual
+        # case, are packed a field at a time: each field's values are shared
+        # in one pass and its column filled from the same list.
+        layouts = list(map(tuple, records))
+        if len(set(layouts)) != 1:
+            for key, record in zip(keys, records):
+                self._append(key, record)
+            return
+        names = layouts[0]
+        fields = []
+        for name, values in zip(names, zip(*map(dict.values, records))):
+            kinds = set(map(type, values))
+            if len(kinds) == 1:
+                kind = kinds.pop()
+                shared = self._sharing(name, kind)
+                if shared is not None:
+                    values = tuple(map(shared.setdefault, values, values))
+                    if len(shared) > self.SHARED_VALUES:
+                        self._shared[(name, kind)] = None
+            else:
+                values = tuple(self._share(name, value) for value in values)
+            fields.append(values)
+        first, count = len(self._ids), len(keys)
+        self._ids.extend(keys)
+        self._data.extend(zip(*fields))
+        self._rows.update(zip(keys, range(first, first + count)))
+        self._positions.extend(range(self._seq, self._seq + count))
+        self._seq += count
+        if self._tombstones:
+            for key in keys:
+                self._tombstones.pop(key, None)
+        self._live.extend(b"\x01" * count)
+        self._layouts.extend(layouts)
+        by_name = dict(zip(names, fields))
+        for name, column in self._columns.items():
+            values = by_name.get(name)
+            column.extend(list(values) if values is not None else [None] * count)
+        for name, index in self._indexes.items():
+            column = self._columns[name]
+            for row in range(first, first + count):
+                index.add(column, row)
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        # Caller holds self._lock
+        return dict(zip(self._layouts.values[self._layouts.codes[row]], self._data[row]))
+
+    def _records(self, rows: List[int]) -> List[Dict[str, Any]]:
+        # Caller holds self._lock. Rows that share a layout, the usual case,
+        # are turned into dicts in C.
+        layouts = set(map(self._layouts.codes.__getitem__, rows))
+        if len(layouts) != 1:
+            return list(map(self._record, rows))
+        names = self._layouts.values[layouts.pop()]
+        return list(map(dict, map(zip, repeat(names), map(self._data.__getitem__, rows))))
+
+    def _compact(self):
+        # Caller holds self._lock
+        rows = list(compress(range(len(self._ids)), self._live))
+        self._ids = list(map(self._ids.__getitem__, rows))
+        self._data = list(map(self._data.__getitem__, rows))
+        self._rows = dict(zip(self._ids, range(len(rows))))
+        self._positions = array("q", map(self._positions.__getitem__, rows))
+        self._live = bytearray(b"\x01" * len(rows))
+        self._layouts = self._layouts.take(rows)
+        self._columns = {name: column.take(rows) for name, column in self._columns.items()}
+        self._reindex()
+
+    # -- querying --------------------------------------------------------
+
+    def _mask(self, filters: list, start: int, end: int) -> bytes:
+        # Caller holds self._lock
+        live = bytes(self._live[start:end])
+        if not filters:
+            return live
+        combined = int.from_bytes(live, "little")
+        for f in filters:
+            if not combined:
+                break
+            combined &= int.from_bytes(f.mask(self, start, end), "little")
+        return combined.to_bytes(end - start, "little")
+
+    def _position_after(self, after: Optional[str]) -> int:
+        """
+        The position a search continuing after load `after` starts past: the
+        load's own, or where it was if it has been deleted since. Raises
+        KeyError if this table has never held it, or forgot it.
+        """
+        # Caller holds self._lock
+        if after is None:
+            return -1
+        row = self._rows.get(after)
+        if row is not None:
+            return self._positions[row]
+        return self._tombstones[after]
+
+    def _candidates(self, filters: list, start: int, limit: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Rows from `start` on that pass every filter, found through the index
+        of the filter that matches fewest rows, or None if no filter is
+        indexed or narrows the board enough for that to beat masking. With a
+        `limit`, masking only has to go as far as it takes to find that
+        many, so the index must narrow the board further still.
+        """
+        # Caller holds self._lock
+        counted = [(f.count(self), i) for i, f in enumerate(filters)]
+        counted = [(count, i) for count, i in counted if count is not None]
+        if not counted:
+            return None
+        count, i = min(counted)
+        if count * self.CANDIDATE_SHARE > len(self._rows):
+            return None
+        if limit is not None and count * count > (limit + 1) * len(self._rows) * self.CANDIDATE_SHARE:
+            # Masking finds a page in about limit * len / count rows, and
+            # costs about 1/CANDIDATE_SHARE as much per row as a candidate
+            return None
+        rows = filters[i].rows(self)
+        rows = rows[bisect_left(rows, start):]
+        for f in filters[:i] + filters[i + 1:]:
+            rows = f.select(self, rows)
+        return rows
+
+    def _scan(self, filters: list, after: Optional[int], ids_only: bool = False,
+              batch: int = 256, limit: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+        """
+        (position, load) for rows after position `after` that pass every
+        filter, or (position, load_id) with `ids_only`. Hits come from an
+        index's candidates (see _candidates) or from masks built a block at
+        a time, and are read in batches under the lock; if the table changed
+        in between, the rest is found again, so every load returned matched
+        when read. `limit` is how many hits the caller means to take, if it
+        knows.
+        """
+        position = -1 if after is None else after
+        if limit is not None:
+            batch = max(1, min(batch, limit))
+        block = self.first_block_rows
+        rows = version = None
+        while True:
+            with self._lock:
+                if rows is None or self._version != version:
+                    start = bisect_right(self._positions, position)
+                    if start >= len(self._positions):
+                        return
+                    rows = self._candidates(filters, start, limit)
+                    if rows is not None:
+                        end = len(self._positions)
+                    else:
+                        end = min(start + block, len(self._positions))
+                        rows = list(compress(range(start, end), self._mask(filters, start, end)))
+                    version = self._version
+                    block_last = self._positions[end - 1]
+                    i = 0
+                taken = rows[i:i + batch]
+                i += len(taken)
+                if taken:
+                    found = list(map(self._ids.__getitem__, taken)) if ids_only else self._records(taken)
+                    hits = list(zip(map(self._positions.__getitem__, taken), found))
+            if taken:
+                yield from hits
+                position = hits[-1][0]
+            if i >= len(rows):
+                position = max(position, block_last)
+                block = min(block * 2, self.block_rows)
+                rows = None
+
+    def iter_search(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        equipment_type: Optional[str] = None,
+        pickup_from: Optional[str] = None,
+        pickup_to: Optional[str] = None,
+        min_rate: Optional[int] = None,
+        after: Optional[str] = None,
+        ids_only: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Lazily yield (position, load) for loads matching every given filter,
+        in load list order, starting after the load whose id is `after`. origin and
+        destination are case-insensitive substrings, equipment_type a
+        case-insensitive match, and pickup_from/pickup_to and min_rate
+        inclusive bounds. With `ids_only` the load_id is yielded in place of
+        the load. `limit` says how many the caller will take, which helps
+        pick how to find them; it doesn't end the iteration.
+
+        A bad pickup_from/pickup_to raises ValueError, and an `after` this
+        table doesn't know (see _position_after) KeyError, here rather than
+        mid-iteration.
+        """
+        lo = parse_timestamp(pickup_from) if pickup_from else None
+        hi = parse_timestamp(pickup_to) if pickup_to else None
+        filters = []
+        if equipment_type:
+            filters.append(ValueFilter("equipment_type", _equals_folded(equipment_type.lower())))
+        if origin:
+            filters.append(SubstringFilter("origin", origin))
+        if destination:
+            filters.append(SubstringFilter("destination", destination))
+        if min_rate is not None:
+            filters.append(RangeFilter("loadboard_rate", min_rate, None))
+        if lo is not None or hi is not None:
+            filters.append(RangeFilter("pickup_datetime", lo, hi))
+        with self._lock:
+            position = self._position_after(after)
+        return self._scan(filters, position, ids_only, limit=limit)
+
+    def search(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        equipment_type: Optional[str] = None,
+        pickup_from: Optional[str] = None,
+        pickup_to: Optional[str] = None,
+        min_rate: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        ids_only: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Loads (or with `ids_only`, load_ids) matching every given filter, in
+        load list order.
+
+        Returns (results, next_after). With a limit, at most that many loads
+        are returned and next_after is the load_id to pass back as `after`
+        for the following page, or None once the results are exhausted.
+        """
+        if limit is None and after is None and not any(
+                (origin, destination, equipment_type, pickup_from, pickup_to, min_rate is not None)):
+            # Everything, in order, without masking
+            with self._lock:
+                return list(self._rows if ids_only else self.values()), None
+        matched = self.iter_search(
+            origin=origin, destination=destination, equipment_type=equipment_type,
+            pickup_from=pickup_from, pickup_to=pickup_to, min_rate=min_rate, after=after, ids_only=ids_only,
+            limit=None if limit is None else limit + 1,
+        )
+        if limit is None:
+            return [load for _, load in matched], None
+        page = list(islice(matched, limit + 1))
+        if len(page) > limit:
+            last = page[limit - 1][1]
+            return [load for _, load in page[:limit]], last if ids_only else last[self.key]
+        return [load for _, load in page], None
@@ -0,0 +1,272 @@
+import threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from store import Storage
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in values]
+
+
+class Gauge(Metric):
+    """A value per label set read from `collect` at scrape time, so updates cost nothing."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, collect: Callable[[], Iterable[Tuple[tuple, float]]], labels=()):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def _samples(self):
+        return [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in self.collect()]
+
+
+class CallbackCounter(Gauge):
+    """A counter whose running totals are kept elsewhere and read from `collect` at scrape time."""
+
+    kind = "counter"
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed buckets per label set. Each observe()
+    is a bisect and three additions under a lock; buckets are only made
+    cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            series = [(k, list(counts), total, count) for k, (counts, total, count) in self._series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte of its response.",
+    labels=("method", "route"),
+))
+requests_total = registry.register(Counter(
+    "http_requests_total", "Requests handled, by response status.", labels=("method", "route", "status"),
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size.", labels=("method", "route"), buckets=SIZE_BUCKETS,
+))
+storage_duration = registry.register(Histogram(
+    "storage_operation_duration_seconds", "Time spent in storage calls: lock (waiting for the cross-process write lock), load, load_changes, write, sync, compact.",
+    labels=("collection", "operation"),
+))
+storage_records_read = registry.register(Counter(
+    "storage_records_read_total", "Records or ops read back from storage.", labels=("collection",),
+))
+storage_ops_written = registry.register(Counter(
+    "storage_ops_written_total", "Puts and deletes written to storage.", labels=("collection",),
+))
+lock_wait = registry.register(Histogram(
+    "collection_lock_wait_seconds", "Time spent waiting for a collection's write lock.", labels=("collection",),
+))
+
+
+class InstrumentedStorage(Storage):
+    """
+    Wraps a Storage to time every read and write into the storage metrics.
+    Anything else, such as a backend's own attributes, passes through.
+    """
+
+    def __init__(self, storage: Storage, collection: str):
+        self.inner = storage
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _timed(self, operation: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            storage_duration.observe(time.perf_counter() - start, self.collection, operation)
+
+    @contextmanager
+    def write_lock(self):
+        start = time.perf_counter()
+        with self.inner.write_lock():
+            storage_duration.observe(time.perf_counter() - start, self.collection, "lock")
+            yield
+
+    def signature(self):
+        return self.inner.signature()
+
+    def load(self):
+        records = self._timed("load", self.inner.load)
+        storage_records_read.inc(self.collection, amount=len(records))
+        return records
+
+    def load_changes(self, signature):
+        ops = self._timed("load_changes", self.inner.load_changes, signature)
+        if ops:
+            storage_records_read.inc(self.collection, amount=len(ops))
+        return ops
+
+    def write(self, records, ops):
+        token = self._timed("write", self.inner.write, records, ops)
+        storage_ops_written.inc(self.collection, amount=len(ops))
+        return token
+
+    def sync(self, token):
+        if token is None:
+            return self.inner.sync(token)
+        return self._timed("sync", self.inner.sync, token)
+
+    def compact(self, records):
+        return self._timed("compact", self.inner.compact, records)
+
+    def needs_compaction(self):
+        return self.inner.needs_compaction()
+
+    def close(self):
+        return self.inner.close()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and response size per route.
+
+    Routes are labelled by their path template ("/loads/{load_id}"), read
+    from the scope once routing has matched, so label cardinality stays
+    bounded. Timing stops when the last body chunk is sent, so streamed
+    responses are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        state = {"status": 500, "bytes": 0, "done": False}
+
+        def finish():
+            if state["done"]:
+                return
+            state["done"] = True
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            request_duration.observe(time.perf_counter() - start, method, path)
+            requests_total.inc(method, path, str(state["status"]))
+            response_size.observe(state["bytes"], method, path)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await send(message)
+                    finish()
+                    return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
@@ -0,0 +1,76 @@
+import base64, json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from encoding import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(kind: str, position: Any) -> str:
+    """Opaque, URL-safe cursor naming where the next page of `kind` starts."""
+    raw = json.dumps({"k": kind, "p": position}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> Any:
+    """Inverse of encode_cursor. Raises ValueError for a malformed or foreign cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict) or data.get("k") != kind or "p" not in data:
+        raise ValueError("Invalid cursor")
+    return data["p"]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated `fields=` value; None means every field."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    return names or None
+
+
+def project(records: Iterable[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Restrict each record to the requested fields that it actually has."""
+    if fields is None:
+        return list(records)
+    return [project_one(r, fields) for r in records]
+
+
+def project_one(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+
+def wants_ndjson(response_format: Optional[str], accept: Optional[str]) -> bool:
+    """True if the client asked for NDJSON via ?format=ndjson or the Accept header."""
+    return response_format == "ndjson" or NDJSON_MEDIA_TYPE in (accept or "")
+
+
+def ndjson_stream(records: Iterable[Dict[str, Any]], fields: Optional[List[str]],
+                  chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Encode records as newline-delimited JSON, pulling them lazily. Lines are
+    grouped into chunks of about `chunk_size` bytes so memory stays flat
+    however many records there are.
+    """
+    return ndjson_chunks((dumps(project_one(record, fields)) for record in records), chunk_size)
+
+
+def ndjson_chunks(lines: Iterable[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """ndjson_stream() for records that are already encoded, one JSON value each."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        buffer.append(b"\n")
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
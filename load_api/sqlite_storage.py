@@ -0,0 +1,181 @@
+import json, os, queue, sqlite3
+from contextlib import contextmanager
+from typing import Optional
+
+from store import FileLock, Storage
+
+
+class SqliteDatabase:
+    """
+    An embedded SQLite database in WAL mode behind a small connection pool.
+
+    Connections are opened in autocommit mode; writers wrap their statements
+    in BEGIN IMMEDIATE ... COMMIT. `collection_meta` holds a version per
+    collection that every write bumps, so readers can tell cheaply whether
+    anything changed.
+    """
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_meta ("
+                " name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SqliteStorage(Storage):
+    """
+    One collection stored as a table in a SqliteDatabase.
+
+    Each record is a row of (seq, key, data) where data is the record's JSON.
+    `seq` keeps collection order. `key` is UNIQUE, so single-record inserts,
+    deletes and lookups are B-tree operations, O(log n), rather than rewrites
+    of the whole dataset.
+
+    If the table has never been written and `import_from` names an existing
+    JSON array file, its records are imported once, in one transaction.
+
+    Every write also records the keys it touched, with the version it
+    produced, in `<table>_changes`. Another process that last saw version v
+    catches up by re-reading just the keys changed after v. The last
+    `change_retention` versions are kept; anyone further behind reloads.
+    Writers in different processes take turns through a lock file per table.
+    """
+
+    def __init__(self, database: SqliteDatabase, table: str, key: str, import_from: Optional[str] = None,
+                 change_retention: int = 10000):
+        self.database = database
+        self.table = table
+        self.key = key
+        self.change_retention = change_retention
+        self._lock_file = FileLock(f"{database.path}.{table}.lock")
+        with database.transaction() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT NOT NULL UNIQUE,"
+                " data TEXT NOT NULL)"
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_changes (version INTEGER NOT NULL, key TEXT NOT NULL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_changes_version ON {table}_changes (version)")
+            initialized = conn.execute(
+                "SELECT 1 FROM collection_meta WHERE name = ?", (table,)
+            ).fetchone()
+            if not initialized:
+                records = []
+                if import_from and os.path.exists(import_from):
+                    with open(import_from, "r") as f:
+                        records = json.load(f)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} (key, data) VALUES (?, ?)",
+                    ((r[key], json.dumps(r)) for r in records),
+                )
+                conn.execute("INSERT INTO collection_meta (name, version) VALUES (?, 1)", (table,))
+
+    def write_lock(self):
+        return self._lock_file
+
+    def signature(self):
+        with self.database.connection() as conn:
+            row = conn.execute("SELECT version FROM collection_meta WHERE name = ?", (self.table,)).fetchone()
+        return row[0] if row else None
+
+    def load(self):
+        with self.database.connection() as conn:
+            rows = conn.execute(f"SELECT data FROM {self.table} ORDER BY seq").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def load_changes(self, signature):
+        if signature is None:
+            return None
+        with self.database.connection() as conn:
+            # One read transaction, so the version, change log and rows agree
+            conn.execute("BEGIN")
+            try:
+                (version,) = conn.execute("SELECT version FROM collection_meta WHERE name = ?", (self.table,)).fetchone()
+                if version == signature:
+                    return []
+                (oldest,) = conn.execute(f"SELECT MIN(version) FROM {self.table}_changes").fetchone()
+                if version < signature or oldest is None or oldest > signature + 1:
+                    return None
+                keys = [k for (k,) in conn.execute(
+                    f"SELECT DISTINCT key FROM {self.table}_changes WHERE version > ?", (signature,)
+                )]
+                rows = []
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows += conn.execute(
+                        f"SELECT seq, key, data FROM {self.table} WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        rows.sort()
+        present = {key for _, key, _ in rows}
+        ops = [("delete", key) for key in keys if key not in present]
+        ops += [("put", json.loads(data)) for _, _, data in rows]
+        return ops
+
+    def write(self, records, ops):
+        with self.database.transaction() as conn:
+            for op in ops:
+                if op[0] == "put":
+                    conn.execute(
+                        f"INSERT INTO {self.table} (key, data) VALUES (?, ?)"
+                        " ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+                        (op[1][self.key], json.dumps(op[1])),
+                    )
+                else:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (op[1],))
+            conn.execute("UPDATE collection_meta SET version = version + 1 WHERE name = ?", (self.table,))
+            (version,) = conn.execute("SELECT version FROM collection_meta WHERE name = ?", (self.table,)).fetchone()
+            conn.executemany(
+                f"INSERT INTO {self.table}_changes (version, key) VALUES (?, ?)",
+                ((version, op[1][self.key] if op[0] == "put" else op[1]) for op in ops),
+            )
+            conn.execute(f"DELETE FROM {self.table}_changes WHERE version <= ?", (version - self.change_retention,))
+        return None
+
+    def close(self):
+        self._lock_file.close()
+        self.database.close()
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Dict, Optional
+
+from conversation_fields import BOOKED, NOT_BOOKED, UNKNOWN, booking_status
+from store import CollectionListener
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+class LoadStats(CollectionListener):
+    """
+    Running aggregates over the load board, kept current by the loads store.
+
+    - equipment_type -> count
+    - origin -> (sum of miles, count of loads with miles)
+
+    Each change adjusts a few counters. The summary built from them is cached
+    until the next change, so reading it doesn't depend on the number of loads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = 0
+        self._equipment: Dict[str, int] = {}
+        self._miles: Dict[str, list] = {}
+        self._summary: Optional[Dict[str, Any]] = None
+
+    def reset(self, records):
+        with self._lock:
+            self._total = 0
+            self._equipment = {}
+            self._miles = {}
+            for record in records:
+                self._apply(record, 1)
+            self._summary = None
+
+    def added(self, record):
+        with self._lock:
+            self._apply(record, 1)
+            self._summary = None
+
+    def removed(self, record):
+        with self._lock:
+            self._apply(record, -1)
+            self._summary = None
+
+    def _apply(self, record, sign: int):
+        # Caller holds self._lock
+        self._total += sign
+        equipment = record.get("equipment_type")
+        if equipment is not None:
+            count = self._equipment.get(equipment, 0) + sign
+            if count:
+                self._equipment[equipment] = count
+            else:
+                self._equipment.pop(equipment, None)
+        origin = record.get("origin")
+        miles = _number(record.get("miles"))
+        if origin is not None and miles is not None:
+            totals = self._miles.setdefault(origin, [0, 0])
+            totals[0] += sign * miles
+            totals[1] += sign
+            if not totals[1]:
+                del self._miles[origin]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Load count, equipment mix (most common first) and average miles by
+        origin (highest first). Loads without miles don't count toward the
+        averages.
+        """
+        with self._lock:
+            if self._summary is None:
+                equipment = sorted(self._equipment.items(), key=lambda kv: -kv[1])
+                averages = sorted(
+                    ((origin, total / count) for origin, (total, count) in self._miles.items()),
+                    key=lambda kv: -kv[1],
+                )
+                self._summary = {
+                    "total": self._total,
+                    "equipment_mix": dict(equipment),
+                    "avg_miles_by_origin": {origin: round(avg, 2) for origin, avg in averages},
+                }
+            return self._summary
+
+
+class ConversationStats(CollectionListener):
+    """Running count of conversations by booking status, kept current by the conversations store."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {BOOKED: 0, NOT_BOOKED: 0, UNKNOWN: 0}
+
+    def reset(self, records):
+        with self._lock:
+            self._counts = {BOOKED: 0, NOT_BOOKED: 0, UNKNOWN: 0}
+            for record in records:
+                self._counts[booking_status(record)] += 1
+
+    def added(self, record):
+        with self._lock:
+            self._counts[booking_status(record)] += 1
+
+    def removed(self, record):
+        with self._lock:
+            self._counts[booking_status(record)] -= 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {"total": sum(counts.values()), "load_status": counts}
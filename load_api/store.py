@@ -0,0 +1,531 @@
+import hashlib, json, os, threading, time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+class CollectionListener:
+    """
+    Receives every change applied to a Collection, in order, while the
+    collection's write lock is held. Used to keep secondary indexes current.
+    """
+
+    def reset(self, records: List[Dict[str, Any]]):
+        pass
+
+    def added(self, record: Dict[str, Any]):
+        pass
+
+    def removed(self, record: Dict[str, Any]):
+        pass
+
+    def replaced(self, old: Dict[str, Any], new: Dict[str, Any]):
+        self.removed(old)
+        self.added(new)
+
+
+class FileLock:
+    """
+    An exclusive flock() on `path`, excluding other processes that lock the
+    same file. It does not exclude threads of this process; callers take
+    their own thread lock first. A no-op where fcntl is unavailable.
+
+    The file also holds a generation counter that the lock holder bumps
+    after each change. Stat results can repeat (a freed inode number is
+    reused, mtime only moves once per clock tick), the counter doesn't.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self._open(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def generation(self) -> int:
+        if fcntl is None:
+            return 0
+        return int.from_bytes(os.pread(self._open(), 8, 0).ljust(8, b"\0"), "little")
+
+    def bump(self):
+        """Advance the generation. Call while holding the lock."""
+        if fcntl is not None:
+            os.pwrite(self._open(), (self.generation() + 1).to_bytes(8, "little"), 0)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class Storage:
+    """
+    Where a collection's records are persisted.
+
+    A change is described as an op: ("put", record) inserts or replaces by
+    key, ("delete", key) removes. Collection calls every method except sync()
+    with its lock held.
+    """
+
+    def write_lock(self):
+        """
+        Context manager held around every read-modify-write, so writers in
+        other processes sharing this storage can't interleave with it.
+        """
+        return nullcontext()
+
+    def signature(self):
+        """Cheap token that changes whenever the stored data changes."""
+        raise NotImplementedError
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Every record, in collection order."""
+        raise NotImplementedError
+
+    def load_changes(self, signature) -> Optional[List[tuple]]:
+        """
+        Ops written by someone else since `signature` was current, or None if
+        they can't be told apart and the collection must load() again.
+        """
+        return None
+
+    def write(self, records: Iterable[Dict[str, Any]], ops: List[tuple]):
+        """
+        Persist `ops` as one commit. `records` iterates every record, in
+        order, with them applied, for storage that can only write everything.
+        Returns a token for sync().
+        """
+        raise NotImplementedError
+
+    def sync(self, token):
+        """Wait until the write behind `token` is durable."""
+        pass
+
+    def compact(self, records: Iterable[Dict[str, Any]]):
+        """Rewrite storage from `records`, discarding history kept for replay."""
+        pass
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def close(self):
+        pass
+
+
+def apply_op(by_key: Dict[str, Dict[str, Any]], key: str, op: tuple) -> tuple:
+    """
+    Apply one op to an ordered key -> record map in place, in O(1). A put of
+    an existing key keeps its position. Returns (old, new): the record it
+    replaced or removed, and the record it stored, either of which may be None.
+    """
+    if op[0] == "put":
+        record = op[1]
+        old = by_key.get(record[key])
+        by_key[record[key]] = record
+        return old, record
+    return by_key.pop(op[1], None), None
+
+
+class JsonFileStorage(Storage):
+    """
+    A JSON array file, rewritten in full on every change.
+
+    A write goes to a temporary file that then replaces the original, so a
+    reader in any process sees either the old file or the new one, never a
+    partial one. Writers in different processes take turns through a lock
+    file next to it.
+    """
+
+    def __init__(self, path: str, missing_ok: bool = False):
+        self.path = path
+        self.missing_ok = missing_ok
+        self._lock_file = FileLock(path + ".lock")
+
+    def write_lock(self):
+        return self._lock_file
+
+    def signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino, self._lock_file.generation())
+
+    def load(self):
+        if self.missing_ok and not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _replace(self, records):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(records), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._lock_file.bump()
+
+    def write(self, records, ops):
+        self._replace(records)
+        return None
+
+    def close(self):
+        self._lock_file.close()
+
+
+class Collection:
+    """
+    A collection of records held resident in memory over a Storage.
+
+    Records live in a dict keyed by primary key, which also keeps them in
+    collection order, so lookups, existence checks, upserts and deletes are
+    O(1) and a delete never shifts the rest. all() hands out a list snapshot,
+    rebuilt lazily on the first read after a write.
+
+    Storage is read once and reads are served from memory. Each read compares
+    the storage signature against the one recorded at the last load, so
+    changes made by hand or by another process are picked up on the next
+    request. Writes made through this object update memory in place and
+    record the resulting signature, so the API never re-reads its own writes.
+
+    Each write runs under the storage's write_lock() and starts by catching
+    up with storage, so several processes can share one storage without
+    losing each other's writes.
+
+    `table` makes the ordered key -> record map, a dict by default. Any
+    MutableMapping that keeps insertion order will do, such as
+    load_table.LoadTable; table() returns the current one. A table with a
+    reload(records) method is brought up to date in place when storage has
+    to be read in full again, rather than built afresh, so it can keep what
+    it holds for records that didn't change.
+    """
+
+    def __init__(self, storage: Storage, key: str, table: Callable[[], MutableMapping] = dict):
+        self.storage = storage
+        self.key = key
+        self._new_table = table
+        self.modified_at = time.time()
+        self._etag = '""'
+        self._lock = threading.RLock()
+        # Called with the seconds spent waiting for the lock, when set
+        self.lock_wait_observer: Optional[Callable[[float], None]] = None
+        # Told about every commit made through this object, when set; see
+        # changes.ChangeLog
+        self.change_log = None
+        self._by_key: Optional[Dict[str, Dict[str, Any]]] = None
+        self._snapshot: Optional[List[Dict[str, Any]]] = None
+        self._signature = None
+        self._listeners: List[CollectionListener] = []
+
+    @contextmanager
+    def _writing(self):
+        # Thread lock first, then storage's cross-process lock, so the
+        # refresh inside a write sees every other process's commits
+        with self._locked(), self.storage.write_lock():
+            yield
+
+    @contextmanager
+    def _locked(self):
+        observer = self.lock_wait_observer
+        if observer is None:
+            with self._lock:
+                yield
+            return
+        start = time.perf_counter()
+        with self._lock:
+            observer(time.perf_counter() - start)
+            yield
+
+    def subscribe(self, listener: CollectionListener):
+        """Register a listener; it is primed with the current records if loaded."""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._by_key is not None:
+                listener.reset(list(self._by_key.values()))
+
+    def _refresh(self):
+        if self._by_key is not None and self.storage.signature() == self._signature:
+            return
+        with self._locked():
+            signature = self.storage.signature()
+            if self._by_key is not None and signature == self._signature:
+                return
+            ops = self.storage.load_changes(self._signature) if self._by_key is not None else None
+            if ops is None:
+                self._load(signature)
+                return
+            self._snapshot = None
+            for op in ops:
+                self._notify(*apply_op(self._by_key, self.key, op))
+            self._signature = signature
+            self._bump()
+
+    def _load(self, signature):
+        # Caller holds self._lock
+        records = self.storage.load()
+        if self._by_key is not None and hasattr(self._by_key, "reload"):
+            self._by_key.reload(records)
+        else:
+            by_key = self._new_table()
+            by_key.update((r[self.key], r) for r in records)
+            self._by_key = by_key
+        self._snapshot = None
+        self._signature = signature
+        for listener in self._listeners:
+            listener.reset(records)
+        self._bump()
+
+    def _notify(self, old, new):
+        for listener in self._listeners:
+            if old is None and new is not None:
+                listener.added(new)
+            elif old is not None and new is None:
+                listener.removed(old)
+            elif old is not None:
+                listener.replaced(old, new)
+
+    def _write(self, ops: List[tuple]):
+        """
+        Apply `ops` and persist them as one storage commit. Returns the
+        (old, new) pair for each op, and the token to pass to storage.sync().
+
+        Caller is inside self._writing(). Readers holding an all() snapshot
+        keep it; the next all() builds a fresh one.
+        """
+        self._refresh()
+        changes = [apply_op(self._by_key, self.key, op) for op in ops]
+        self._snapshot = None
+        try:
+            token = self.storage.write(self._by_key.values(), ops)
+        except BaseException:
+            # The write didn't happen, so memory goes back to what storage has
+            self._load(self.storage.signature())
+            raise
+        self._signature = self.storage.signature()
+        for old, new in changes:
+            self._notify(old, new)
+        # Bump last: an ETag read before the indexes caught up would
+        # otherwise validate stale results
+        self._bump()
+        if self.change_log is not None:
+            self.change_log.append(changes, self.key)
+        return changes, token
+
+    def _sync(self, token):
+        # Called once the write lock is released
+        self.storage.sync(token)
+        if self.change_log is not None:
+            self.change_log.sync()
+
+    def _bump(self):
+        # Caller has just recorded the signature of the storage state the
+        # records now reflect. Every worker sharing the storage sees that
+        # state alike (lock file generation, journal offset, SQLite version),
+        # so they all derive the same ETag for the same data.
+        self.modified_at = time.time()
+        digest = hashlib.blake2b(repr(self._signature).encode(), digest_size=8).hexdigest()
+        self._etag = f'"{digest}"'
+
+    @property
+    def etag(self) -> str:
+        """Strong validator for the current data, the same in every worker sharing the storage."""
+        return self._etag
+
+    def refresh(self):
+        """Reload from storage if it changed since it was last read."""
+        self._refresh()
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Current records, in order. The returned list must be treated as read-only."""
+        self._refresh()
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = list(self._by_key.values())
+                snapshot = self._snapshot
+        return snapshot
+
+    def table(self) -> MutableMapping:
+        """The current key -> record map, after a refresh. Treat it as read-only."""
+        self._refresh()
+        return self._by_key
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._by_key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return self._by_key.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._refresh()
+        return key in self._by_key
+
+    def insert(self, record: Dict[str, Any]) -> bool:
+        """Append a record. Returns False if its key already exists."""
+        with self._writing():
+            if record[self.key] in self:
+                return False
+            _, token = self._write([("put", record)])
+        self._sync(token)
+        return True
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Append several records in one storage commit, skipping any whose key
+        already exists or came earlier in the batch. Returns, per record,
+        True if it was inserted.
+        """
+        if not records:
+            return []
+        with self._writing():
+            self._refresh()
+            present = self._by_key
+            fresh = set()
+            inserted = []
+            for record in records:
+                key = record[self.key]
+                ok = key not in present and key not in fresh
+                if ok:
+                    fresh.add(key)
+                inserted.append(ok)
+            if not fresh:
+                return inserted
+            _, token = self._write([("put", r) for r, ok in zip(records, inserted) if ok])
+        self._sync(token)
+        return inserted
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """Insert or replace a record by key. Returns True if it was created."""
+        return self.upsert_many([record])[0]
+
+    def upsert_many(self, records: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Insert or replace several records in one storage commit. Returns, per
+        record, True if it was created. A key repeated within the batch is
+        created once and then updated.
+        """
+        if not records:
+            return []
+        with self._writing():
+            changes, token = self._write([("put", record) for record in records])
+        self._sync(token)
+        return [old is None for old, _ in changes]
+
+    def update_all(self, transform: Callable[[Dict[str, Any]], Dict[str, Any]]) -> int:
+        """
+        Replace every record with transform(record), in one storage commit,
+        where that gives a different record. Returns how many changed.
+
+        The records are read after catching up with storage and under the
+        write lock, so a record another process saves meanwhile is
+        transformed as saved rather than overwritten with an older copy.
+        """
+        with self._writing():
+            self._refresh()
+            ops = []
+            for record in self._by_key.values():
+                updated = transform(record)
+                if updated != record:
+                    ops.append(("put", updated))
+            if not ops:
+                return 0
+            _, token = self._write(ops)
+        self._sync(token)
+        return len(ops)
+
+    def delete(self, key: str) -> Optional[Dict[str, Any]]:
+        """Remove a record by key. Returns the removed record, or None."""
+        with self._writing():
+            if key not in self:
+                return None
+            [(old, _)], token = self._write([("delete", key)])
+        self._sync(token)
+        return old
+
+    def compact(self):
+        """Fold storage history into a fresh snapshot of the current records."""
+        with self._writing():
+            self._refresh()
+            self.storage.compact(self._by_key.values())
+            self._signature = self.storage.signature()
+
+    def close(self):
+        with self._lock:
+            self.storage.close()
+
+
+class _Batch:
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: List[bool] = []
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommit:
+    """
+    Coalesces single-record upserts that arrive within `window` seconds into
+    one Collection.upsert_many() call, so a burst costs one storage commit
+    instead of one per record.
+
+    The first caller to find no open batch becomes its leader: it waits out
+    the window (or until `max_batch` records have joined), commits the batch
+    and wakes the others. A window of 0 commits every record on its own.
+    """
+
+    def __init__(self, collection: Collection, window: float = 0.002, max_batch: int = 500):
+        self.collection = collection
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """Same contract as Collection.upsert: True if the record was created."""
+        if self.window <= 0:
+            return self.collection.upsert(record)
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            position = len(batch.records)
+            batch.records.append(record)
+            if len(batch.records) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            try:
+                batch.results = self.collection.upsert_many(batch.records)
+            except BaseException as e:
+                batch.error = e
+            batch.done.set()
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[position]
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an ISO-8601 string to epoch seconds. A trailing "Z" is accepted and
+    naive values are taken as UTC so every pickup time sorts on one axis.
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
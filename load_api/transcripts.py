@@ -0,0 +1,230 @@
+import mmap, os, struct, threading, zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from store import FileLock
+
+# crc32 of id + payload, compressed length, uncompressed length, id length
+FRAME = struct.Struct("<IIIH")
+
+
+class TranscriptArchive:
+    """
+    Full call transcripts, kept out of the conversation records.
+
+    Transcripts are zlib-compressed and appended to segment files in
+    `directory` (segment-00000001.seg, ...); a segment is sealed once it
+    reaches `segment_bytes` and the next one started. Each frame is:
+
+    - FRAME header: crc32, compressed length, text length, id length
+    - the conversation_id, UTF-8
+    - the compressed transcript
+
+    An in-memory index maps conversation_id to (segment, payload offset,
+    compressed length, text length). It is rebuilt at open() by walking the
+    frame headers, so there is no separate index file to keep in step.
+    Storing a transcript again supersedes the old frame, which stays on disk.
+
+    Reads slice the payload out of a read-only mmap of its segment, so a
+    lookup costs one decompression of that transcript and nothing else.
+
+    Appends hold a lock file next to the segments, so several processes can
+    share a directory; each picks up the others' frames when it misses an
+    id or appends. A frame torn by a crash mid-append is cut off the next
+    time the lock is taken.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, level: int = 6):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._file_lock: Optional[FileLock] = None
+        self._index: Dict[str, Tuple[int, int, int, int]] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        # Segment being scanned / appended to, and how far into it the index goes
+        self._segment = 1
+        self._scanned = 0
+        self._fd: Optional[int] = None
+        self._fd_segment = 0
+        self._opened = False
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:08d}.seg")
+
+    # -- scanning --------------------------------------------------------
+
+    def _scan(self, truncate: bool):
+        """
+        Index frames past the scanned offset, moving on to later segments.
+        Stops at an incomplete or corrupt frame, cutting it off when
+        `truncate` is set (the caller holds the file lock, so nobody is
+        still writing it). Caller holds self._lock.
+        """
+        while True:
+            path = self._path(self._segment)
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                size = 0
+            end = self._scan_segment(self._segment, size) if size > self._scanned else self._scanned
+            if end < size:
+                if not truncate:
+                    return
+                os.truncate(path, end)
+                self._maps.pop(self._segment, None)
+            self._scanned = end
+            if not os.path.exists(self._path(self._segment + 1)):
+                return
+            self._segment += 1
+            self._scanned = 0
+
+    def _scan_segment(self, segment: int, size: int) -> int:
+        """Index the complete frames of `segment` from the scanned offset; returns where they end."""
+        with open(self._path(segment), "rb") as f:
+            view = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            pos = self._scanned
+            while pos + FRAME.size <= size:
+                crc, length, text_length, id_length = FRAME.unpack_from(view, pos)
+                start = pos + FRAME.size
+                payload = start + id_length
+                end = payload + length
+                if id_length == 0 or end > size or zlib.crc32(view[start:end]) != crc:
+                    break
+                conversation_id = view[start:payload].decode("utf-8", "surrogatepass")
+                self._index[conversation_id] = (segment, payload, length, text_length)
+                pos = end
+            return pos
+        finally:
+            view.close()
+
+    def open(self):
+        """Create the directory if needed and index what is already archived."""
+        if self._opened:
+            return
+        with self._lock:
+            if self._opened:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._file_lock = FileLock(os.path.join(self.directory, "archive.lock"))
+            with self._file_lock:
+                self._scan(truncate=True)
+            self._opened = True
+
+    # -- writing ---------------------------------------------------------
+
+    def _frame(self, conversation_id: str, text: str) -> Tuple[bytes, int, int, int]:
+        """(frame bytes, id length, compressed length, text length)."""
+        # surrogatepass: JSON lets a lone surrogate through as an escape
+        key = conversation_id.encode("utf-8", "surrogatepass")
+        raw = text.encode("utf-8", "surrogatepass")
+        payload = zlib.compress(raw, self.level)
+        header = FRAME.pack(zlib.crc32(payload, zlib.crc32(key)), len(payload), len(raw), len(key))
+        return header + key + payload, len(key), len(payload), len(raw)
+
+    def _append_fd(self, size: int, incoming: int) -> int:
+        """The fd to append to, rolling to a new segment if this write would overflow. Caller holds both locks."""
+        if size > 0 and size + incoming > self.segment_bytes:
+            self._segment += 1
+            self._scanned = 0
+        if self._fd is not None and self._fd_segment != self._segment:
+            os.close(self._fd)
+            self._fd = None
+        if self._fd is None:
+            self._fd = os.open(self._path(self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_segment = self._segment
+        return self._fd
+
+    def put_many(self, transcripts: Iterable[Tuple[str, str]]):
+        """Archive (conversation_id, transcript) pairs in one append and one fsync."""
+        frames = [(conversation_id, self._frame(conversation_id, text)) for conversation_id, text in transcripts]
+        if not frames:
+            return
+        self.open()
+        data = b"".join(frame for _, (frame, _, _, _) in frames)
+        with self._lock, self._file_lock:
+            # Index whatever other processes appended, so the end is known
+            self._scan(truncate=True)
+            fd = self._append_fd(self._scanned, len(data))
+            os.write(fd, data)
+            os.fsync(fd)
+            pos = self._scanned
+            for conversation_id, (frame, id_length, length, text_length) in frames:
+                self._index[conversation_id] = (self._segment, pos + FRAME.size + id_length, length, text_length)
+                pos += len(frame)
+            self._scanned = pos
+
+    def put(self, conversation_id: str, text: str):
+        self.put_many([(conversation_id, text)])
+
+    # -- reading ---------------------------------------------------------
+
+    def _view(self, segment: int, end: int) -> mmap.mmap:
+        """A map of `segment` covering at least `end` bytes. Caller holds self._lock."""
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            # The active segment grows; map it again. A replaced map is
+            # closed once no reader is still slicing it
+            with open(self._path(segment), "rb") as f:
+                view = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return view
+
+    def _locate(self, conversation_id: str) -> Optional[Tuple[int, int, int, int]]:
+        self.open()
+        with self._lock:
+            entry = self._index.get(conversation_id)
+            if entry is None:
+                # Perhaps another process archived it since we last looked
+                self._scan(truncate=False)
+                entry = self._index.get(conversation_id)
+            return entry
+
+    def info(self, conversation_id: str) -> Optional[Dict[str, int]]:
+        """Where the transcript is kept and its sizes, without reading it. None if there is none."""
+        entry = self._locate(conversation_id)
+        if entry is None:
+            return None
+        segment, offset, length, text_length = entry
+        return {"segment": segment, "offset": offset, "compressed_bytes": length, "bytes": text_length}
+
+    def read(self, info: Dict[str, int]) -> str:
+        """The transcript at a location returned by info()."""
+        segment, offset, length = info["segment"], info["offset"], info["compressed_bytes"]
+        with self._lock:
+            view = self._view(segment, offset + length)
+        return zlib.decompress(view[offset:offset + length]).decode("utf-8", "surrogatepass")
+
+    def get(self, conversation_id: str) -> Optional[str]:
+        """The full transcript, or None if none was archived for this conversation."""
+        info = self.info(conversation_id)
+        return self.read(info) if info is not None else None
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return self._locate(conversation_id) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "transcripts": len(self._index),
+                "segments": self._segment if self._opened else 0,
+                "bytes": sum(os.path.getsize(p) for p in self._segment_paths()),
+            }
+
+    def _segment_paths(self) -> List[str]:
+        return [p for p in (self._path(s) for s in range(1, self._segment + 1)) if os.path.exists(p)]
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            for view in self._maps.values():
+                view.close()
+            self._maps.clear()
+            if self._file_lock is not None:
+                self._file_lock.close()
+                self._file_lock = None
+            self._index.clear()
+            self._segment = 1
+            self._scanned = 0
+            self._opened = False